@@ -1,5 +1,7 @@
 from datetime import datetime, timezone
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError
 import uuid
 
 # GST Rates Configuration
@@ -18,14 +20,55 @@ ACCOUNT_TYPES = {
     'Expenses': ['Office Rent', 'Staff Salaries', 'Marketing', 'Utilities', 'Travel Expenses', 'Miscellaneous']
 }
 
+# Counter document holding the last issued account code number
+ACCOUNT_CODE_COUNTER = 'account_code'
+
+# Server error code of a unique index violation
+DUPLICATE_KEY_ERROR = 11000
+
+# Order in which a journal's documents are written
+JOURNAL_COLLECTIONS = ['revenues', 'expenses', 'ledgers', 'gst_records']
+
+class JournalBatch:
+    """
+    Everything one business event writes: documents per collection plus the
+    account balance postings. Built in memory, then committed in one go by
+    AccountingService.commit_journal.
+    """
+    def __init__(self):
+        self.documents: Dict[str, List[dict]] = {name: [] for name in JOURNAL_COLLECTIONS}
+        self.postings: List[Tuple[str, float, str]] = []
+    
+    def add(self, collection_name: str, *docs: dict):
+        self.documents.setdefault(collection_name, []).extend(docs)
+    
+    def add_entry(self, entry: Optional[Dict]):
+        """Add the output of one of the AccountingService.build_* methods"""
+        if not entry:
+            return
+        self.add('ledgers', *entry.get('ledgers', []))
+        self.add('gst_records', *entry.get('gst_records', []))
+        self.postings.extend(entry.get('postings', []))
+    
+    def post(self, account_name: str, amount: float, type: str):
+        self.postings.append((account_name, amount, type))
+    
+    def is_empty(self) -> bool:
+        return not self.postings and not any(self.documents.values())
+
 class AccountingService:
     def __init__(self, db):
         self.db = db
+        # In-process chart of accounts: name -> {id, name, type, code} (balances stay in MongoDB)
+        self._accounts: Optional[Dict[str, dict]] = None
+        self._supports_transactions: Optional[bool] = None
     
     async def initialize_accounts(self):
-        """Initialize chart of accounts if not exists"""
+        """Initialize chart of accounts if not exists and load the account cache"""
         existing = await self.db.accounts.count_documents({})
         if existing > 0:
+            await self._seed_code_counter(existing)
+            await self.load_accounts()
             return
         
         accounts = []
@@ -42,6 +85,106 @@ class AccountingService:
         
         if accounts:
             await self.db.accounts.insert_many(accounts)
+        await self._seed_code_counter(len(accounts))
+        await self.load_accounts()
+    
+    # ============ CHART OF ACCOUNTS CACHE ============
+    
+    async def load_accounts(self) -> Dict[str, dict]:
+        """(Re)load the chart of accounts cache"""
+        accounts = await self.db.accounts.find(
+            {}, {'_id': 0, 'id': 1, 'name': 1, 'type': 1, 'code': 1}
+        ).to_list(None)
+        self._accounts = {account['name']: account for account in accounts}
+        return self._accounts
+    
+    def invalidate_accounts(self):
+        """Drop the cache; the next posting reloads it (call after bulk account writes)"""
+        self._accounts = None
+    
+    async def _seed_code_counter(self, issued: int):
+        """Make sure the code counter is never behind the codes already issued"""
+        await self.db.counters.update_one(
+            {'_id': ACCOUNT_CODE_COUNTER},
+            {'$max': {'seq': issued}},
+            upsert=True
+        )
+    
+    async def _next_account_codes(self, count: int, session=None) -> int:
+        """Atomically reserve `count` account code numbers; returns the first one"""
+        counter = await self.db.counters.find_one_and_update(
+            {'_id': ACCOUNT_CODE_COUNTER},
+            {'$inc': {'seq': count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        return counter['seq'] - count + 1
+    
+    async def ensure_accounts(self, account_types: Dict[str, str], session=None) -> List[dict]:
+        """
+        Create any accounts missing from the chart (auto-created vendor/expense accounts).
+        Inside a transaction (`session`) the new accounts are returned instead of
+        cached, so the caller caches them only once the transaction has committed.
+        """
+        if self._accounts is None:
+            await self.load_accounts()
+        
+        missing = [name for name in account_types if name not in self._accounts]
+        if not missing:
+            return []
+        
+        # Another worker may have created them since our last load
+        await self.load_accounts()
+        missing = [name for name in missing if name not in self._accounts]
+        if not missing:
+            return []
+        
+        first_code = await self._next_account_codes(len(missing), session=session)
+        timestamp = datetime.now(timezone.utc).isoformat()
+        accounts = []
+        for offset, name in enumerate(missing):
+            account_type = account_types[name]
+            accounts.append({
+                'id': str(uuid.uuid4()),
+                'name': name,
+                'type': account_type,
+                'code': f"{account_type[:3].upper()}-{first_code + offset:04d}",
+                'balance': 0.0,
+                'created_at': timestamp
+            })
+        
+        try:
+            await self.db.accounts.insert_many(accounts, ordered=False, session=session)
+        except BulkWriteError as e:
+            if session is not None:
+                raise  # The error has aborted the transaction; let it fail (and be retried) as a whole
+            errors = e.details.get('writeErrors', [])
+            if any(error.get('code') != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+            # Lost a creation race on the unique name index: the other worker's accounts
+            # (with their own id and code) were stored, ours were not
+            rejected = {error['index'] for error in errors}
+            losers = [accounts[index]['name'] for index in rejected]
+            accounts = [account for index, account in enumerate(accounts) if index not in rejected]
+            stored = await self.db.accounts.find(
+                {'name': {'$in': losers}}, {'_id': 0, 'id': 1, 'name': 1, 'type': 1, 'code': 1}
+            ).to_list(None)
+            for account in stored:
+                self._accounts[account['name']] = account
+        
+        for account in accounts:
+            account.pop('_id', None)
+            account.pop('balance', None)
+            account.pop('created_at', None)
+        if session is None:
+            self._cache_accounts(accounts)
+        return accounts
+    
+    def _cache_accounts(self, accounts: List[dict]):
+        if self._accounts is not None:
+            for account in accounts:
+                self._accounts.setdefault(account['name'], account)
     
     def calculate_gst(self, amount: float, source: str) -> Dict[str, float]:
         """Calculate GST breakdown for a transaction"""
@@ -66,9 +209,19 @@ class AccountingService:
     
     async def create_revenue_ledger_entry(self, revenue_data: dict):
         """Create double-entry ledger for revenue transaction"""
+        entry = self.build_revenue_ledger_entry(revenue_data)
+        if not entry:
+            return
+        
+        await self.db.ledgers.insert_many(entry['ledgers'])
+        await self.db.gst_records.insert_many(entry['gst_records'])
+        await self.apply_balance_deltas(entry['postings'])
+    
+    def build_revenue_ledger_entry(self, revenue_data: dict) -> Optional[Dict]:
+        """Build (without writing) the ledger lines, GST record and postings for a revenue"""
         amount = revenue_data['received_amount']
         if amount <= 0:
-            return
+            return None
         
         source = revenue_data['source']
         gst_breakdown = self.calculate_gst(amount, source)
@@ -136,8 +289,6 @@ class AccountingService:
             }
         ]
         
-        await self.db.ledgers.insert_many(ledger_entries)
-        
         # Store GST record
         gst_record = {
             'id': str(uuid.uuid4()),
@@ -158,16 +309,24 @@ class AccountingService:
             'created_at': timestamp
         }
         
-        await self.db.gst_records.insert_one(gst_record)
+        # Account balance postings
+        postings = [
+            ('Cash' if revenue_data['payment_mode'] == 'Cash' else 'Bank - Current Account', amount, 'debit'),
+            (f"{source} Revenue", gst_breakdown['taxable_amount'], 'credit'),
+            ('GST Payable - CGST', gst_breakdown['cgst'], 'credit'),
+            ('GST Payable - SGST', gst_breakdown['sgst'], 'credit')
+        ]
         
-        # Update account balances
-        await self.update_account_balance('Cash' if revenue_data['payment_mode'] == 'Cash' else 'Bank - Current Account', amount, 'debit')
-        await self.update_account_balance(f"{source} Revenue", gst_breakdown['taxable_amount'], 'credit')
-        await self.update_account_balance('GST Payable - CGST', gst_breakdown['cgst'], 'credit')
-        await self.update_account_balance('GST Payable - SGST', gst_breakdown['sgst'], 'credit')
+        return {'ledgers': ledger_entries, 'gst_records': [gst_record], 'postings': postings}
     
     async def create_expense_ledger_entry(self, expense_data: dict):
         """Create double-entry ledger for expense transaction"""
+        entry = self.build_expense_ledger_entry(expense_data)
+        await self.db.ledgers.insert_many(entry['ledgers'])
+        await self.apply_balance_deltas(entry['postings'])
+    
+    def build_expense_ledger_entry(self, expense_data: dict) -> Dict:
+        """Build (without writing) the ledger lines and postings for an expense"""
         amount = expense_data['amount']
         
         entry_id = str(uuid.uuid4())
@@ -204,38 +363,107 @@ class AccountingService:
             }
         ]
         
-        await self.db.ledgers.insert_many(ledger_entries)
+        # Account balance postings
+        postings = [
+            (expense_data['category'], amount, 'debit'),
+            ('Cash' if expense_data['payment_mode'] == 'Cash' else 'Bank - Current Account', amount, 'credit')
+        ]
         
-        # Update account balances
-        await self.update_account_balance(expense_data['category'], amount, 'debit')
-        await self.update_account_balance('Cash' if expense_data['payment_mode'] == 'Cash' else 'Bank - Current Account', amount, 'credit')
+        return {'ledgers': ledger_entries, 'gst_records': [], 'postings': postings}
     
     async def update_account_balance(self, account_name: str, amount: float, type: str):
         """Update account balance"""
-        account = await self.db.accounts.find_one({'name': account_name})
-        if not account:
-            # Create account if doesn't exist
-            account_type = 'Expenses' if type == 'debit' else 'Income'
-            account = {
-                'id': str(uuid.uuid4()),
-                'name': account_name,
-                'type': account_type,
-                'code': f"{account_type[:3].upper()}-{await self.db.accounts.count_documents({})+1:04d}",
-                'balance': 0.0,
-                'created_at': datetime.now(timezone.utc).isoformat()
-            }
-            await self.db.accounts.insert_one(account)
+        await self.apply_balance_deltas([(account_name, amount, type)])
+    
+    async def apply_balance_deltas(self, postings: List[Tuple[str, float, str]], session=None) -> List[dict]:
+        """
+        Apply (account_name, amount, 'debit'|'credit') postings atomically.
+        Postings are netted per account and sent as one bulk_write of $inc upserts,
+        so a whole journal entry costs a single round trip and concurrent
+        postings to the same account never lose updates. Returns the accounts
+        created on the way (see ensure_accounts).
+        """
+        deltas = {}
+        account_types = {}
+        for account_name, amount, type in postings:
+            signed = amount if type == 'debit' else -amount
+            deltas[account_name] = deltas.get(account_name, 0.0) + signed
+            # Type for auto-created accounts follows the first posting
+            account_types.setdefault(account_name, 'Expenses' if type == 'debit' else 'Income')
+        
+        if not deltas:
+            return []
+        
+        # Known accounts are resolved from the cache, so no per-posting lookup
+        created = await self.ensure_accounts(account_types, session=session)
+        
+        operations = [
+            UpdateOne({'name': account_name}, {'$inc': {'balance': delta}})
+            for account_name, delta in deltas.items()
+        ]
+        result = await self.db.accounts.bulk_write(operations, ordered=False, session=session)
+        if result.matched_count == len(operations):
+            return created
+        
+        # An account vanished behind the cache (e.g. a restore in another worker):
+        # recreate it, with a code, through the chart instead of a code-less upsert
+        stored = {
+            account['name'] for account in await self.db.accounts.find(
+                {'name': {'$in': list(deltas)}}, {'_id': 0, 'name': 1}, session=session
+            ).to_list(None)
+        }
+        vanished = [account_name for account_name in deltas if account_name not in stored]
+        self.invalidate_accounts()
+        created += await self.ensure_accounts({name: account_types[name] for name in vanished}, session=session)
+        result = await self.db.accounts.bulk_write([
+            UpdateOne({'name': account_name}, {'$inc': {'balance': deltas[account_name]}})
+            for account_name in vanished
+        ], ordered=False, session=session)
+        if result.matched_count != len(vanished):
+            raise RuntimeError(f"Accounts missing after re-creation: {', '.join(vanished)}")
+        return created
+    
+    # ============ JOURNAL POSTING ============
+    
+    async def supports_transactions(self) -> bool:
+        """Multi-document transactions need a replica set or a sharded cluster"""
+        if self._supports_transactions is None:
+            try:
+                hello = await self.db.client.admin.command('hello')
+                self._supports_transactions = bool(hello.get('setName')) or hello.get('msg') == 'isdbgrid'
+            except Exception:
+                self._supports_transactions = False
+        return self._supports_transactions
+    
+    async def _write_journal(self, batch: JournalBatch, session=None) -> List[dict]:
+        # One ordered insert per collection, then one bulk write for all balances
+        for collection_name, docs in batch.documents.items():
+            if docs:
+                await self.db[collection_name].insert_many(docs, ordered=True, session=session)
+        return await self.apply_balance_deltas(batch.postings, session=session)
+    
+    async def commit_journal(self, batch: JournalBatch):
+        """Write a journal batch, inside a multi-document transaction when the deployment supports it"""
+        if batch.is_empty():
+            return
         
-        current_balance = account.get('balance', 0.0)
-        if type == 'debit':
-            new_balance = current_balance + amount
-        else:
-            new_balance = current_balance - amount
+        if not await self.supports_transactions():
+            await self._write_journal(batch)
+            return
         
-        await self.db.accounts.update_one(
-            {'name': account_name},
-            {'$set': {'balance': new_balance}}
-        )
+        async def write(session):
+            # Re-run from scratch when the driver retries a TransientTransactionError
+            return await self._write_journal(batch, session=session)
+        
+        async with await self.db.client.start_session() as session:
+            try:
+                # Retries transient errors and unknown commit results
+                created = await session.with_transaction(write)
+            except Exception:
+                # Accounts seen in the aborted transaction may exist elsewhere; reload on next use
+                self.invalidate_accounts()
+                raise
+        self._cache_accounts(created)
     
     async def update_revenue_ledger_entry(self, revenue_id: str, old_amount: float, new_amount: float, revenue_data: dict):
         """Update existing revenue ledger entries with difference-based approach"""
@@ -248,6 +476,7 @@ class AccountingService:
         
         # Update ledger entries by applying the difference
         ledger_entries = await self.db.ledgers.find({'reference_id': revenue_id}).to_list(100)
+        balance_postings = []
         
         for entry in ledger_entries:
             old_debit = entry.get('debit', 0.0)
@@ -261,8 +490,7 @@ class AccountingService:
                     {'$set': {'debit': new_debit}}
                 )
                 # Update account balance with difference
-                account_name = entry['account']
-                await self.update_account_balance(account_name, amount_diff * old_debit / old_amount, 'debit')
+                balance_postings.append((entry['account'], amount_diff * old_debit / old_amount, 'debit'))
             
             if old_credit > 0:
                 new_credit = old_credit + (amount_diff * old_credit / old_amount)
@@ -271,8 +499,9 @@ class AccountingService:
                     {'$set': {'credit': new_credit}}
                 )
                 # Update account balance with difference
-                account_name = entry['account']
-                await self.update_account_balance(account_name, amount_diff * old_credit / old_amount, 'credit')
+                balance_postings.append((entry['account'], amount_diff * old_credit / old_amount, 'credit'))
+        
+        await self.apply_balance_deltas(balance_postings)
         
         # Update GST records if they exist
         gst_records = await self.db.gst_records.find({'reference_id': revenue_id}).to_list(100)
@@ -304,6 +533,7 @@ class AccountingService:
         
         # Update ledger entries by applying the difference
         ledger_entries = await self.db.ledgers.find({'reference_id': expense_id}).to_list(100)
+        balance_postings = []
         
         for entry in ledger_entries:
             old_debit = entry.get('debit', 0.0)
@@ -317,8 +547,7 @@ class AccountingService:
                     {'$set': {'debit': new_debit}}
                 )
                 # Update account balance with difference
-                account_name = entry['account']
-                await self.update_account_balance(account_name, amount_diff, 'debit')
+                balance_postings.append((entry['account'], amount_diff, 'debit'))
             
             if old_credit > 0:
                 new_credit = old_credit + amount_diff
@@ -327,8 +556,9 @@ class AccountingService:
                     {'$set': {'credit': new_credit}}
                 )
                 # Update account balance with difference
-                account_name = entry['account']
-                await self.update_account_balance(account_name, amount_diff, 'credit')
+                balance_postings.append((entry['account'], amount_diff, 'credit'))
+        
+        await self.apply_balance_deltas(balance_postings)
         
         # Update GST records for Purchase for Resale
         if expense_data.get('purchase_type') == 'Purchase for Resale' and expense_data.get('gst_rate', 0) > 0:
@@ -434,6 +664,10 @@ class AccountingService:
     
     async def create_input_gst_record(self, expense_data: dict):
         """Create GST input record for purchases"""
+        await self.db.gst_records.insert_one(self.build_input_gst_record(expense_data))
+    
+    def build_input_gst_record(self, expense_data: dict) -> Dict:
+        """Build (without writing) the GST input record for a purchase"""
         amount = expense_data['amount']
         gst_rate = expense_data.get('gst_rate', 0) / 100
         
@@ -445,7 +679,7 @@ class AccountingService:
         
         timestamp = datetime.now(timezone.utc).isoformat()
         
-        gst_record = {
+        return {
             'id': str(uuid.uuid4()),
             'date': expense_data['date'],
             'type': 'input',  # Input GST (purchases)
@@ -462,8 +696,6 @@ class AccountingService:
             'reference_id': expense_data['id'],
             'created_at': timestamp
         }
-        
-        await self.db.gst_records.insert_one(gst_record)
 
 
     async def create_vendor_payment_ledger_entries(self, revenue_id: str, cost_detail: dict, vendor_payments: List[Dict]):
@@ -473,7 +705,16 @@ class AccountingService:
         - Debit: Vendor - [Vendor Name] (Liability decrease)
         - Credit: Bank/Cash (Asset decrease)
         """
+        entry = self.build_vendor_payment_ledger_entries(revenue_id, cost_detail, vendor_payments)
+        if entry['ledgers']:
+            await self.db.ledgers.insert_many(entry['ledgers'])
+        await self.apply_balance_deltas(entry['postings'])
+    
+    def build_vendor_payment_ledger_entries(self, revenue_id: str, cost_detail: dict, vendor_payments: List[Dict]) -> Dict:
+        """Build (without writing) the ledger lines and postings for vendor payments"""
         vendor_name = cost_detail.get('vendor_name', 'Unknown Vendor')
+        ledger_entries = []
+        balance_postings = []
         
         for payment in vendor_payments:
             payment_id = payment.get('id', str(uuid.uuid4()))
@@ -515,12 +756,13 @@ class AccountingService:
                 'created_at': timestamp
             }
             
-            # Insert both ledger entries
-            await self.db.ledgers.insert_many([vendor_ledger, payment_ledger])
+            ledger_entries.extend([vendor_ledger, payment_ledger])
             
             # Update account balances
-            await self.update_account_balance(f"Vendor - {vendor_name}", amount, 'debit')
-            await self.update_account_balance(payment_account, amount, 'credit')
+            balance_postings.append((f"Vendor - {vendor_name}", amount, 'debit'))
+            balance_postings.append((payment_account, amount, 'credit'))
+        
+        return {'ledgers': ledger_entries, 'gst_records': [], 'postings': balance_postings}
     
     async def delete_vendor_payment_ledger_entries(self, revenue_id: str, cost_detail_id: str):
         """Delete all vendor payment ledger entries for a specific cost detail"""
@@ -533,6 +775,7 @@ class AccountingService:
         }).to_list(1000)
         
         # Reverse each entry (opposite operation to restore balance)
+        balance_postings = []
         for entry in ledger_entries:
             account = entry['account']
             debit_amount = entry.get('debit', 0)
@@ -540,9 +783,11 @@ class AccountingService:
             
             # Reverse the balance change
             if debit_amount > 0:
-                await self.update_account_balance(account, debit_amount, 'credit')
+                balance_postings.append((account, debit_amount, 'credit'))
             if credit_amount > 0:
-                await self.update_account_balance(account, credit_amount, 'debit')
+                balance_postings.append((account, credit_amount, 'debit'))
+        
+        await self.apply_balance_deltas(balance_postings)
         
         # Delete the ledger entries
         await self.db.ledgers.delete_many({
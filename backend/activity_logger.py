@@ -1,37 +1,265 @@
-from datetime import datetime
-from typing import Optional
+import os
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Optional, Dict, List
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Entries buffered in memory before callers are back-pressured
+DEFAULT_QUEUE_SIZE = 10000
+# Entries written per insert_many
+DEFAULT_BATCH_SIZE = 500
+# Seconds a partial batch may wait before it is flushed
+DEFAULT_FLUSH_INTERVAL = 1.0
+# Seconds a caller waits for queue space before the entry is dropped
+DEFAULT_PUT_TIMEOUT = 0.05
+
+# Days an activity log is kept before the TTL index removes it (counters are kept forever)
+ACTIVITY_LOG_RETENTION_DAYS = int(os.getenv("ACTIVITY_LOG_RETENTION_DAYS", 365))
+
 
 class ActivityLogger:
+    """
+    Single activity-log pipeline. log_activity only enqueues; a background
+    writer flushes the queue with insert_many when a batch fills up or the
+    flush interval passes, and drains it on shutdown.
+    """
+
     def __init__(self, db):
         self.db = db
-    
+        self.queue_size = int(os.getenv("ACTIVITY_LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+        self.batch_size = int(os.getenv("ACTIVITY_LOG_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+        self.flush_interval = float(os.getenv("ACTIVITY_LOG_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL))
+        self.put_timeout = float(os.getenv("ACTIVITY_LOG_PUT_TIMEOUT", DEFAULT_PUT_TIMEOUT))
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self.metrics = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "back_pressured": 0,
+            "failed": 0,
+            "count_failed": 0,
+            "flushes": 0,
+        }
+
+    # ============ WRITER ============
+
+    def start(self):
+        """Start the background writer (entries are written inline until this is called)"""
+        if self._writer is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._writer = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer after flushing everything still queued"""
+        if self._writer is None:
+            return
+        await self._queue.put(None)
+        await self._writer
+        self._writer = None
+        self._queue = None
+
+    async def _write(self, entries: List[dict]):
+        self.metrics["flushes"] += 1
+        try:
+            await self.db.activity_logs.insert_many(entries, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: everything but the rejected entries was stored, and still has to be counted
+            rejected = {error["index"] for error in e.details.get("writeErrors", [])}
+            self.metrics["failed"] += len(rejected)
+            logger.error("Failed to write %d of %d activity log entries: %s", len(rejected), len(entries), e)
+            entries = [entry for i, entry in enumerate(entries) if i not in rejected]
+        except Exception as e:
+            self.metrics["failed"] += len(entries)
+            logger.error("Failed to write %d activity log entries: %s", len(entries), e)
+            return
+        self.metrics["written"] += len(entries)
+        if not entries:
+            return
+
+        # The logs are stored at this point; a counter failure only makes the stats undercount
+        try:
+            await self._count(entries)
+        except Exception as e:
+            self.metrics["count_failed"] += len(entries)
+            logger.warning("Failed to count %d stored activity log entries: %s", len(entries), e)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            entry = await self._queue.get()
+            if entry is None:
+                break
+
+            batch = [entry]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+
+            await self._write(batch)
+
+    # ============ COUNTERS ============
+
+    async def _count(self, entries: List[dict]):
+        """Add a batch to the per-day / module / action counters"""
+        counts = {}
+        for entry in entries:
+            key = (entry["timestamp"].strftime("%Y-%m-%d"), entry["module"], entry["action"])
+            counts[key] = counts.get(key, 0) + 1
+
+        await self.db.activity_log_counters.bulk_write([
+            UpdateOne({"day": day, "module": module, "action": action}, {"$inc": {"count": count}}, upsert=True)
+            for (day, module, action), count in counts.items()
+        ], ordered=False)
+
+    async def rebuild_counters(self) -> int:
+        """Regenerate the counters from the logs still stored"""
+        pipeline = [
+            {"$match": {"timestamp": {"$type": "date"}}},
+            {
+                "$group": {
+                    "_id": {
+                        "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+                        "module": "$module",
+                        "action": "$action"
+                    },
+                    "count": {"$sum": 1}
+                }
+            }
+        ]
+        groups = await self.db.activity_logs.aggregate(pipeline).to_list(None)
+        await self.db.activity_log_counters.delete_many({})
+        if groups:
+            await self.db.activity_log_counters.insert_many([{**group["_id"], "count": group["count"]} for group in groups])
+        return len(groups)
+
+    async def migrate_timestamps(self, count: bool = False) -> int:
+        """
+        Convert ISO string timestamps left by older writers to dates (so TTL and sorting apply).
+        With count, the converted logs are added to the counters, which only cover dated logs.
+        """
+        migrated = 0
+        while True:
+            logs = await self.db.activity_logs.find(
+                {"timestamp": {"$type": "string"}}, {"_id": 1, "timestamp": 1, "module": 1, "action": 1}
+            ).limit(self.batch_size).to_list(None)
+            if not logs:
+                break
+
+            operations = []
+            for log in logs:
+                try:
+                    timestamp = datetime.fromisoformat(log["timestamp"])
+                except ValueError:
+                    timestamp = datetime.now(timezone.utc)
+                if timestamp.tzinfo is None:
+                    timestamp = timestamp.replace(tzinfo=timezone.utc)
+                # Counted by its UTC day, like the counters built from stored dates
+                log["timestamp"] = timestamp.astimezone(timezone.utc)
+                operations.append(UpdateOne({"_id": log["_id"]}, {"$set": {"timestamp": timestamp}}))
+            await self.db.activity_logs.bulk_write(operations, ordered=False)
+            if count:
+                await self._count(logs)
+            migrated += len(operations)
+        return migrated
+
+    async def prepare_storage(self):
+        """Startup: type legacy timestamps and build the counters the first time"""
+        counters_built = await self.db.activity_log_counters.find_one({}, {"_id": 1}) is not None
+        # Existing counters get the converted logs added; otherwise they are built from scratch below
+        migrated = await self.migrate_timestamps(count=counters_built)
+        if migrated:
+            logger.info("Converted %d activity log timestamps to dates", migrated)
+        if not counters_built:
+            await self.rebuild_counters()
+
+    async def get_stats(self, days: int = 30, module: Optional[str] = None) -> List[Dict]:
+        """Activity volume per day (total plus per module and per action) from the counters"""
+        since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        query = {"day": {"$gte": since}}
+        if module:
+            query["module"] = module
+
+        stats = {}
+        async for counter in self.db.activity_log_counters.find(query, {"_id": 0}):
+            day = stats.setdefault(counter["day"], {"day": counter["day"], "total": 0, "by_module": {}, "by_action": {}})
+            day["total"] += counter["count"]
+            day["by_module"][counter["module"]] = day["by_module"].get(counter["module"], 0) + counter["count"]
+            day["by_action"][counter["action"]] = day["by_action"].get(counter["action"], 0) + counter["count"]
+        return [stats[day] for day in sorted(stats)]
+
+    # ============ LOGGING ============
+
     async def log_activity(
         self,
         module: str,
         action: str,
-        user: str,
-        details: Optional[dict] = None
+        user: str = "admin",
+        details: Optional[dict] = None,
+        description: str = ""
     ):
         """Log user activity"""
+        entry = {
+            "id": str(uuid.uuid4()),
+            "timestamp": datetime.now(timezone.utc),
+            "module": module,
+            "action": action,
+            "user": user,
+            "description": description,
+            "details": details or {}
+        }
+
+        if self._writer is None:
+            await self._write([entry])
+            return
+
         try:
-            log_entry = {
-                "module": module,
-                "action": action,
-                "user": user,
-                "details": details or {},
-                "timestamp": datetime.utcnow()
-            }
-            await self.db.activity_logs.insert_one(log_entry)
-        except Exception as e:
-            print(f"Failed to log activity: {e}")
-    
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            # Writer is behind: wait briefly for space, then give up rather than slow the request
+            self.metrics["back_pressured"] += 1
+            try:
+                await asyncio.wait_for(self._queue.put(entry), self.put_timeout)
+            except asyncio.TimeoutError:
+                self.metrics["dropped"] += 1
+                return
+        self.metrics["enqueued"] += 1
+
+    def get_metrics(self) -> Dict:
+        return {
+            **self.metrics,
+            "queue_size": self._queue.qsize() if self._queue else 0,
+            "queue_capacity": self.queue_size,
+            "running": self._writer is not None
+        }
+
     async def get_logs(self, limit: int = 100, module: Optional[str] = None):
         """Get activity logs"""
         query = {}
         if module:
             query["module"] = module
-        
+
         logs = await self.db.activity_logs.find(query).sort("timestamp", -1).limit(limit).to_list(None)
         for log in logs:
             log["_id"] = str(log["_id"])
+            log.setdefault("id", log["_id"])
+            # MongoDB returns naive datetimes; they are UTC
+            if isinstance(log.get("timestamp"), datetime) and log["timestamp"].tzinfo is None:
+                log["timestamp"] = log["timestamp"].replace(tzinfo=timezone.utc)
         return logs
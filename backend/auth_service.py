@@ -0,0 +1,79 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Tuple
+
+from passlib.context import CryptContext
+from jose import jwt, JWTError
+
+# bcrypt work factor (log2 rounds); stored hashes with a different factor are re-hashed on login
+DEFAULT_BCRYPT_ROUNDS = 12
+# Threads hashing / verifying passwords at once (further calls queue for a free thread)
+DEFAULT_PASSWORD_HASH_WORKERS = 2
+# Decoded tokens kept by verify_token
+DEFAULT_TOKEN_CACHE_SIZE = 1024
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing and verification off the event loop. Each call runs in a
+    small dedicated thread pool, so a burst of logins queues up behind
+    `workers` threads instead of blocking every other request.
+    """
+
+    def __init__(self, rounds: int = None, workers: int = None):
+        self.rounds = rounds or int(os.getenv("BCRYPT_ROUNDS", DEFAULT_BCRYPT_ROUNDS))
+        self.workers = workers or int(os.getenv("PASSWORD_HASH_WORKERS", DEFAULT_PASSWORD_HASH_WORKERS))
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=self.rounds)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new_hash); new_hash is set when the stored hash uses an outdated work factor"""
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class TokenCache:
+    """LRU of decoded JWT payloads, so repeated requests with one token skip the signature check"""
+
+    def __init__(self, secret_key: str, algorithm: str, max_entries: int = None):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.max_entries = max_entries or int(os.getenv("TOKEN_CACHE_SIZE", DEFAULT_TOKEN_CACHE_SIZE))
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def decode(self, token: str) -> Optional[Dict]:
+        """Decoded payload, or None for an invalid / expired token"""
+        payload = self._entries.get(token)
+        if payload is not None:
+            if payload.get("exp") is not None and payload["exp"] <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return payload
+
+        try:
+            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except JWTError:
+            return None
+
+        self._entries[token] = payload
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return payload
+
+    def clear(self):
+        self._entries.clear()
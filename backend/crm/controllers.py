@@ -1,16 +1,45 @@
+import os
+import asyncio
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from bson import ObjectId
+from bson import ObjectId, json_util
+from pymongo import UpdateOne
 import uuid
 
 from .models import Lead, LeadCreate, LeadUpdate, Reminder, ReminderCreate, ReminderUpdate
 from .utils import generate_lead_id, generate_referral_code
+from .search import build_search_keys, build_search_query, SEARCH_KEYS_VERSION, SEARCH_SOURCE_FIELDS
+from .cache import TTLCache
+from pagination import fetch_page
+
+# Seconds a filtered lead count is reused by count="estimate"
+LEAD_COUNT_CACHE_TTL = float(os.getenv("LEAD_COUNT_CACHE_TTL", 60))
+
+# Seconds the CRM dashboard summary is served from cache (lead / reminder writes clear it)
+DASHBOARD_CACHE_TTL = float(os.getenv("CRM_DASHBOARD_CACHE_TTL", 15))
+
+# Keyset order of the lead listing (newest first)
+LEAD_SORT_FIELDS = ["created_at", "_id"]
 
 
 class CRMController:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
+        self._lead_counts = TTLCache(LEAD_COUNT_CACHE_TTL)
+        self._dashboard_cache = TTLCache(DASHBOARD_CACHE_TTL, max_entries=4)
+    
+    def _leads_changed(self):
+        """Drop cached lead counts and the dashboard summary after any lead mutation"""
+        self._lead_counts.clear()
+        self._dashboard_cache.clear()
+    
+    def _reminders_changed(self):
+        self._dashboard_cache.clear()
+    
+    def invalidate_caches(self):
+        """Drop every cached count (after leads / reminders are replaced wholesale, e.g. a restore)"""
+        self._leads_changed()
     
     # ============ LEAD OPERATIONS ============
     
@@ -28,6 +57,7 @@ class CRMController:
         lead_dict["referred_clients"] = []
         lead_dict["loyalty_points"] = 0
         lead_dict["revenue_id"] = None
+        lead_dict["search_keys"] = build_search_keys(lead_dict)
         
         # Handle referral
         if lead_dict.get("reference_from"):
@@ -35,9 +65,30 @@ class CRMController:
         
         result = await self.db.leads.insert_one(lead_dict)
         lead_dict["_id"] = str(result.inserted_id)
+        self._leads_changed()
+        lead_dict.pop("search_keys")
         
         return lead_dict
     
+    async def count_leads(self, query: Dict, mode: str = "exact") -> Optional[int]:
+        """
+        Lead total for a listing.
+        exact: count_documents; estimate: collection metadata for an unfiltered
+        listing, otherwise a count cached for LEAD_COUNT_CACHE_TTL seconds; none: skip.
+        """
+        if mode == "none":
+            return None
+        if mode == "estimate":
+            if not query:
+                return await self.db.leads.estimated_document_count()
+            key = json_util.dumps(query, sort_keys=True)
+            total = self._lead_counts.get(key)
+            if total is None:
+                total = await self.db.leads.count_documents(query)
+                self._lead_counts.set(key, total)
+            return total
+        return await self.db.leads.count_documents(query)
+    
     async def get_leads(
         self,
         skip: int = 0,
@@ -47,9 +98,15 @@ class CRMController:
         source: Optional[str] = None,
         search: Optional[str] = None,
         date_from: Optional[str] = None,
-        date_to: Optional[str] = None
+        date_to: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Get leads with filters and pagination"""
+        """
+        Get leads with filters and pagination.
+        When `cursor` is given ("" for the first page) pages are fetched by keyset on
+        (created_at, _id), so every page costs the same; `skip` paging is kept for old clients.
+        """
         query = {}
         
         if lead_type:
@@ -59,14 +116,9 @@ class CRMController:
         if source:
             query["source"] = source
         
-        if search:
-            query["$or"] = [
-                {"client_name": {"$regex": search, "$options": "i"}},
-                {"primary_phone": {"$regex": search, "$options": "i"}},
-                {"email": {"$regex": search, "$options": "i"}},
-                {"lead_id": {"$regex": search, "$options": "i"}},
-                {"referral_code": {"$regex": search, "$options": "i"}}
-            ]
+        search_query = build_search_query(search)
+        if search_query:
+            query.update(search_query)
         
         if date_from or date_to:
             query["created_at"] = {}
@@ -75,8 +127,24 @@ class CRMController:
             if date_to:
                 query["created_at"]["$lte"] = datetime.fromisoformat(date_to)
         
-        total = await self.db.leads.count_documents(query)
-        leads = await self.db.leads.find(query).sort("created_at", -1).skip(skip).limit(limit).to_list(None)
+        if cursor is not None:
+            page = await fetch_page(self.db.leads, query, LEAD_SORT_FIELDS, limit,
+                                    cursor=cursor or None, projection={"search_keys": 0})
+            total = await self.count_leads(query, count or "estimate")
+            leads = page["items"]
+            for lead in leads:
+                lead["_id"] = str(lead["_id"])
+            return {
+                "leads": leads,
+                "next_cursor": page["next_cursor"],
+                "has_more": page["has_more"],
+                "total": total
+            }
+        
+        total = await self.count_leads(query, count or "exact")
+        leads = await self.db.leads.find(query, {"search_keys": 0}).sort(
+            [(field, -1) for field in LEAD_SORT_FIELDS]
+        ).skip(skip).limit(limit).to_list(None)
         
         # Convert ObjectId to string
         for lead in leads:
@@ -86,20 +154,20 @@ class CRMController:
             "leads": leads,
             "total": total,
             "page": (skip // limit) + 1,
-            "pages": (total + limit - 1) // limit
+            "pages": (total + limit - 1) // limit if total is not None else None
         }
     
     async def get_lead_by_id(self, lead_id: str) -> Optional[dict]:
         """Get a single lead by ID or lead_id"""
         # Try by ObjectId first
         try:
-            lead = await self.db.leads.find_one({"_id": ObjectId(lead_id)})
+            lead = await self.db.leads.find_one({"_id": ObjectId(lead_id)}, {"search_keys": 0})
         except:
             lead = None
         
         # Try by lead_id
         if not lead:
-            lead = await self.db.leads.find_one({"lead_id": lead_id})
+            lead = await self.db.leads.find_one({"lead_id": lead_id}, {"search_keys": 0})
         
         if lead:
             lead["_id"] = str(lead["_id"])
@@ -114,6 +182,8 @@ class CRMController:
         
         update_dict = {k: v for k, v in lead_data.dict().items() if v is not None}
         update_dict["updated_at"] = datetime.utcnow()
+        if any(field in update_dict for field in SEARCH_SOURCE_FIELDS):
+            update_dict["search_keys"] = build_search_keys({**lead, **update_dict})
         
         # Check if status changed to Booked or Converted
         old_status = lead.get("status")
@@ -129,6 +199,7 @@ class CRMController:
             {"_id": ObjectId(lead["_id"])},
             {"$set": update_dict}
         )
+        self._leads_changed()
         
         return await self.get_lead_by_id(lead_id)
     
@@ -139,8 +210,26 @@ class CRMController:
             return False
         
         result = await self.db.leads.delete_one({"_id": ObjectId(lead["_id"])})
+        self._leads_changed()
         return result.deleted_count > 0
     
+    async def ensure_search_keys(self, batch_size: int = 1000) -> int:
+        """Add / refresh search_keys on leads written before search keys existed (or with an older version)"""
+        updated = 0
+        while True:
+            leads = await self.db.leads.find(
+                {"search_keys.v": {"$ne": SEARCH_KEYS_VERSION}},
+                {field: 1 for field in SEARCH_SOURCE_FIELDS}
+            ).limit(batch_size).to_list(None)
+            if not leads:
+                break
+            await self.db.leads.bulk_write([
+                UpdateOne({"_id": lead["_id"]}, {"$set": {"search_keys": build_search_keys(lead)}})
+                for lead in leads
+            ], ordered=False)
+            updated += len(leads)
+        return updated
+    
     # ============ DOCUMENT OPERATIONS ============
     
     async def add_document(self, lead_id: str, document: dict) -> bool:
@@ -184,6 +273,7 @@ class CRMController:
         
         result = await self.db.reminders.insert_one(reminder_dict)
         reminder_dict["_id"] = str(result.inserted_id)
+        self._reminders_changed()
         
         return reminder_dict
     
@@ -230,6 +320,7 @@ class CRMController:
         
         if result.modified_count == 0:
             return None
+        self._reminders_changed()
         
         reminder = await self.db.reminders.find_one({"_id": ObjectId(reminder_id)})
         if reminder:
@@ -240,41 +331,56 @@ class CRMController:
     async def delete_reminder(self, reminder_id: str) -> bool:
         """Delete a reminder"""
         result = await self.db.reminders.delete_one({"_id": ObjectId(reminder_id)})
+        if result.deleted_count:
+            self._reminders_changed()
         return result.deleted_count > 0
     
     # ============ DASHBOARD & ANALYTICS ============
     
     async def get_dashboard_summary(self) -> dict:
-        """Get dashboard summary with counts and stats"""
-        total_leads = await self.db.leads.count_documents({})
-        active_leads = await self.db.leads.count_documents({"status": {"$in": ["New", "In Process"]}})
-        booked_leads = await self.db.leads.count_documents({"status": {"$in": ["Booked", "Converted"]}})
+        """Get dashboard summary with counts and stats (one $facet over leads plus one reminder count, cached briefly)"""
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        cached = self._dashboard_cache.get(today)
+        if cached is not None:
+            return cached
         
         # Upcoming travels (next 10 days)
-        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
         next_10_days = today + timedelta(days=10)
-        upcoming_travels = await self.db.leads.count_documents({
-            "travel_date": {"$gte": today, "$lte": next_10_days}
-        })
-        
-        # Today's reminders
         tomorrow = today + timedelta(days=1)
-        today_reminders = await self.db.reminders.count_documents({
-            "date": {"$gte": today, "$lt": tomorrow},
-            "status": "Pending"
-        })
         
-        # Total referrals
-        total_referrals = await self.db.leads.count_documents({"reference_from": {"$ne": None}})
+        def count(match: dict) -> list:
+            return [{"$match": match}, {"$count": "n"}] if match else [{"$count": "n"}]
         
-        return {
-            "total_leads": total_leads,
-            "active_leads": active_leads,
-            "booked_leads": booked_leads,
-            "upcoming_travels": upcoming_travels,
+        pipeline = [{
+            "$facet": {
+                "total_leads": count({}),
+                "active_leads": count({"status": {"$in": ["New", "In Process"]}}),
+                "booked_leads": count({"status": {"$in": ["Booked", "Converted"]}}),
+                "upcoming_travels": count({"travel_date": {"$gte": today, "$lte": next_10_days}}),
+                "total_referrals": count({"reference_from": {"$ne": None}})
+            }
+        }]
+        
+        facets, today_reminders = await asyncio.gather(
+            self.db.leads.aggregate(pipeline).to_list(None),
+            # Today's reminders
+            self.db.reminders.count_documents({
+                "date": {"$gte": today, "$lt": tomorrow},
+                "status": "Pending"
+            })
+        )
+        counts = {name: (rows[0]["n"] if rows else 0) for name, rows in facets[0].items()}
+        
+        summary = {
+            "total_leads": counts["total_leads"],
+            "active_leads": counts["active_leads"],
+            "booked_leads": counts["booked_leads"],
+            "upcoming_travels": counts["upcoming_travels"],
             "today_reminders": today_reminders,
-            "total_referrals": total_referrals
+            "total_referrals": counts["total_referrals"]
         }
+        self._dashboard_cache.set(today, summary)
+        return summary
     
     async def get_monthly_leads(self, year: int) -> List[dict]:
         """Get monthly lead counts for a year"""
@@ -358,7 +464,7 @@ class CRMController:
         
         leads = await self.db.leads.find({
             "travel_date": {"$gte": today, "$lte": next_10_days}
-        }).sort("travel_date", 1).to_list(None)
+        }, {"search_keys": 0}).sort("travel_date", 1).to_list(None)
         
         for lead in leads:
             lead["_id"] = str(lead["_id"])
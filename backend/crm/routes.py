@@ -57,19 +57,26 @@ async def get_leads(
     search: Optional[str] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
+    cursor: Optional[str] = None,
+    count: Optional[str] = Query(None, pattern="^(exact|estimate|none)$"),
     controller: CRMController = Depends(get_crm_controller)
 ):
-    """Get leads with filters and pagination"""
-    result = await controller.get_leads(
-        skip=skip,
-        limit=limit,
-        lead_type=lead_type,
-        status=status,
-        source=source,
-        search=search,
-        date_from=date_from,
-        date_to=date_to
-    )
+    """Get leads with filters and pagination (pass cursor= for keyset pages, then next_cursor)"""
+    try:
+        result = await controller.get_leads(
+            skip=skip,
+            limit=limit,
+            lead_type=lead_type,
+            status=status,
+            source=source,
+            search=search,
+            date_from=date_from,
+            date_to=date_to,
+            cursor=cursor,
+            count=count
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return result
 
 
@@ -0,0 +1,95 @@
+import re
+from typing import Optional, Dict, List
+
+# Bump when the way search keys are derived changes; stale leads are re-keyed on startup
+SEARCH_KEYS_VERSION = 1
+
+# Longest name prefix stored as a token (longer query words are truncated to it)
+MAX_PREFIX_LENGTH = 15
+
+# Minimum digits before a query is treated as a phone number
+MIN_PHONE_DIGITS = 3
+
+LEAD_ID_PATTERN = re.compile(r"^LD-[\d-]*$", re.IGNORECASE)
+REFERRAL_CODE_PATTERN = re.compile(r"^[A-Za-z0-9]{6}$")
+PHONE_PATTERN = re.compile(r"^[\d\s()+-]+$")
+
+# Lead fields the search keys are derived from
+SEARCH_SOURCE_FIELDS = ("client_name", "primary_phone", "alternate_phone", "email")
+
+
+def normalize_phone(phone: Optional[str]) -> List[str]:
+    """Digits only, plus the 10-digit national number when a country / trunk prefix is present"""
+    digits = re.sub(r"\D", "", phone or "")
+    if not digits:
+        return []
+    keys = [digits]
+    if len(digits) > 10:
+        keys.append(digits[-10:])
+    return keys
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    email = (email or "").strip().lower()
+    return email or None
+
+
+def name_tokens(name: Optional[str]) -> List[str]:
+    """Lower-case prefixes (edge n-grams) of every word in the name"""
+    tokens = set()
+    for word in re.findall(r"\w+", (name or "").lower()):
+        for length in range(1, min(len(word), MAX_PREFIX_LENGTH) + 1):
+            tokens.add(word[:length])
+    return sorted(tokens)
+
+
+def build_search_keys(lead: Dict) -> Dict:
+    """The `search_keys` sub-document stored on every lead"""
+    phones = []
+    for field in ("primary_phone", "alternate_phone"):
+        for key in normalize_phone(lead.get(field)):
+            if key not in phones:
+                phones.append(key)
+    return {
+        "v": SEARCH_KEYS_VERSION,
+        "name_tokens": name_tokens(lead.get("client_name")),
+        "phones": phones,
+        "email": normalize_email(lead.get("email")),
+    }
+
+
+def build_search_query(search: str) -> Optional[Dict]:
+    """
+    Turn a search box string into a query served by a single index:
+    - LD-... lead ids      -> ix_lead_id (exact, or anchored prefix while typing)
+    - anything with '@'    -> ix_search_email (anchored prefix)
+    - digits / phone chars -> ix_search_phones_created_at (anchored prefix)
+    - 6-char codes         -> ix_referral_code (exact) or name tokens
+    - everything else      -> ix_search_name_tokens_created_at (every word must match a name prefix)
+    """
+    term = (search or "").strip()
+    if not term:
+        return None
+
+    if LEAD_ID_PATTERN.match(term):
+        lead_id = term.upper()
+        if re.match(r"^LD-\d{8}-\d{4}$", lead_id):
+            return {"lead_id": lead_id}
+        return {"lead_id": {"$regex": f"^{lead_id}"}}
+
+    if "@" in term:
+        return {"search_keys.email": {"$regex": f"^{re.escape(term.lower())}"}}
+
+    if PHONE_PATTERN.match(term):
+        digits = re.sub(r"\D", "", term)
+        if len(digits) >= MIN_PHONE_DIGITS:
+            return {"search_keys.phones": {"$regex": f"^{digits}"}}
+
+    words = [word[:MAX_PREFIX_LENGTH] for word in re.findall(r"\w+", term.lower())]
+    if not words:
+        return {"_id": None}  # nothing searchable: match nothing rather than everything
+    by_name = {"search_keys.name_tokens": {"$all": words}} if len(words) > 1 else {"search_keys.name_tokens": words[0]}
+
+    if REFERRAL_CODE_PATTERN.match(term):
+        return {"$or": [{"referral_code": term.upper()}, by_name]}
+    return by_name
@@ -0,0 +1,74 @@
+import os
+from urllib.parse import quote_plus
+from typing import Dict, Any
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+# Connection pool / timeout defaults (overridable through the environment)
+DEFAULT_MAX_POOL_SIZE = 100
+DEFAULT_MIN_POOL_SIZE = 5
+DEFAULT_MAX_IDLE_TIME_MS = 60000
+DEFAULT_SERVER_SELECTION_TIMEOUT_MS = 5000
+DEFAULT_CONNECT_TIMEOUT_MS = 10000
+DEFAULT_SOCKET_TIMEOUT_MS = 30000
+DEFAULT_WAIT_QUEUE_TIMEOUT_MS = 10000
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+
+def build_mongo_uri() -> str:
+    """Build the MongoDB connection string from the environment"""
+    # A full URL wins over the individual Atlas credentials
+    mongo_url = os.getenv("MONGO_URL")
+    if mongo_url:
+        return mongo_url
+
+    user = quote_plus(os.getenv("MONGO_USER", ""))
+    password = quote_plus(os.getenv("MONGO_PASS", ""))
+    host = os.getenv("MONGO_HOST", "souldashboard.keakxoe.mongodb.net")
+    return f"mongodb+srv://{user}:{password}@{host}/?appName=souldashboard"
+
+
+def get_client_options() -> Dict[str, Any]:
+    """Connection pool and timeout options for the shared client"""
+    return {
+        "maxPoolSize": _env_int("MONGO_MAX_POOL_SIZE", DEFAULT_MAX_POOL_SIZE),
+        "minPoolSize": _env_int("MONGO_MIN_POOL_SIZE", DEFAULT_MIN_POOL_SIZE),
+        "maxIdleTimeMS": _env_int("MONGO_MAX_IDLE_TIME_MS", DEFAULT_MAX_IDLE_TIME_MS),
+        "serverSelectionTimeoutMS": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", DEFAULT_SERVER_SELECTION_TIMEOUT_MS),
+        "connectTimeoutMS": _env_int("MONGO_CONNECT_TIMEOUT_MS", DEFAULT_CONNECT_TIMEOUT_MS),
+        "socketTimeoutMS": _env_int("MONGO_SOCKET_TIMEOUT_MS", DEFAULT_SOCKET_TIMEOUT_MS),
+        "waitQueueTimeoutMS": _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", DEFAULT_WAIT_QUEUE_TIMEOUT_MS),
+        "retryWrites": True,
+    }
+
+
+def create_client(uri: str = None, **overrides) -> AsyncIOMotorClient:
+    """Create the async (Motor) client shared by every service"""
+    options = get_client_options()
+    options.update(overrides)
+    return AsyncIOMotorClient(uri or build_mongo_uri(), **options)
+
+
+def get_database(client: AsyncIOMotorClient, name: str = None) -> AsyncIOMotorDatabase:
+    """Return the application database from the shared client"""
+    return client[name or os.getenv("MONGO_DB", "souldashboard")]
+
+
+async def ping(client: AsyncIOMotorClient) -> bool:
+    """Check that the deployment is reachable"""
+    try:
+        await client.admin.command("ping")
+        return True
+    except Exception as e:
+        print(f"MongoDB ping failed: {e}")
+        return False
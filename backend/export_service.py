@@ -0,0 +1,142 @@
+import os
+import csv
+import io
+import json
+import asyncio
+import tempfile
+from datetime import datetime
+from typing import Optional, Dict, List, AsyncIterator
+
+# Rows fetched from MongoDB per round trip / rows per emitted chunk
+EXPORT_BATCH_SIZE = 1000
+
+# Column order of the flat (CSV / XLSX) exports
+EXPORT_COLUMNS: Dict[str, List[str]] = {
+    "revenues": [
+        "id", "date", "client_name", "source", "payment_mode", "sale_price", "received_amount",
+        "pending_amount", "status", "total_cost_price", "profit", "profit_margin", "supplier",
+        "notes", "lead_id", "cost_price_details", "partial_payments", "created_at"
+    ],
+    "expenses": [
+        "id", "date", "category", "payment_mode", "amount", "description", "purchase_type",
+        "supplier_gstin", "invoice_number", "gst_rate", "linked_revenue_id", "created_at"
+    ],
+    "ledgers": [
+        "id", "entry_id", "date", "account", "account_type", "debit", "credit", "description",
+        "reference_type", "reference_id", "created_at"
+    ],
+    "gst_records": [
+        "id", "date", "type", "invoice_number", "client_name", "gstin", "supplier_gstin",
+        "service_type", "category", "taxable_amount", "cgst", "sgst", "igst", "total_gst",
+        "total_amount", "gst_rate", "reference_id", "created_at"
+    ],
+}
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def _cell(value):
+    """Flatten a document value for CSV / XLSX cells"""
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class ExportService:
+    def __init__(self, db, batch_size: int = EXPORT_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+
+    def _cursor(self, collection_name: str, start_date: Optional[str], end_date: Optional[str]):
+        query = {}
+        if start_date or end_date:
+            query["date"] = {}
+            if start_date:
+                query["date"]["$gte"] = start_date
+            if end_date:
+                query["date"]["$lte"] = end_date
+        return self.db[collection_name].find(query, {"_id": 0}).sort("date", 1).batch_size(self.batch_size)
+
+    async def _batches(self, collection_name: str, start_date: Optional[str], end_date: Optional[str]) -> AsyncIterator[List[dict]]:
+        batch = []
+        async for doc in self._cursor(collection_name, start_date, end_date):
+            batch.append(doc)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def stream_ndjson(self, collection_name: str, start_date: Optional[str] = None,
+                            end_date: Optional[str] = None) -> AsyncIterator[bytes]:
+        async for batch in self._batches(collection_name, start_date, end_date):
+            yield "".join(json.dumps(doc, default=str) + "\n" for doc in batch).encode()
+
+    async def stream_csv(self, collection_name: str, start_date: Optional[str] = None,
+                         end_date: Optional[str] = None) -> AsyncIterator[bytes]:
+        columns = EXPORT_COLUMNS[collection_name]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue().encode()
+
+        async for batch in self._batches(collection_name, start_date, end_date):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([_cell(doc.get(column)) for column in columns] for doc in batch)
+            yield buffer.getvalue().encode()
+
+    async def stream_xlsx(self, collection_name: str, start_date: Optional[str] = None,
+                          end_date: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        XLSX cannot be emitted row by row, so rows go into a write-only
+        workbook (spooled to disk by openpyxl) which is then streamed back.
+        """
+        from openpyxl import Workbook
+
+        columns = EXPORT_COLUMNS[collection_name]
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=collection_name)
+        sheet.append(columns)
+
+        def append_rows(batch):
+            for doc in batch:
+                sheet.append([_cell(doc.get(column)) for column in columns])
+
+        async for batch in self._batches(collection_name, start_date, end_date):
+            await asyncio.to_thread(append_rows, batch)
+
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        try:
+            await asyncio.to_thread(workbook.save, path)
+            with open(path, "rb") as f:
+                while True:
+                    chunk = await asyncio.to_thread(f.read, 64 * 1024)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            os.remove(path)
+
+    def stream(self, collection_name: str, format: str, start_date: Optional[str] = None,
+               end_date: Optional[str] = None) -> AsyncIterator[bytes]:
+        if collection_name not in EXPORT_COLUMNS:
+            raise ValueError(f"Unsupported collection: {collection_name}")
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported format: {format}")
+        if format == "xlsx":
+            try:
+                import openpyxl  # noqa: F401
+            except ImportError:
+                raise ValueError("XLSX export requires openpyxl to be installed")
+        writer = getattr(self, f"stream_{format}")
+        return writer(collection_name, start_date, end_date)
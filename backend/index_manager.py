@@ -0,0 +1,243 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Any
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from activity_logger import ACTIVITY_LOG_RETENTION_DAYS
+
+# Managed indexes carry this prefix so we never touch indexes created by hand
+INDEX_PREFIX = "ix_"
+
+# Versioned index specs per collection.
+# Bump a collection's version whenever its index list changes; indexes that
+# disappear from the list are dropped on the next startup.
+INDEX_SPECS: Dict[str, Dict[str, Any]] = {
+    "revenues": {
+        "version": 2,
+        "indexes": [
+            IndexModel([("id", ASCENDING)], name="ix_id", unique=True),
+            # Keyset pagination on (date, id), optionally filtered by status or source
+            IndexModel([("date", DESCENDING), ("id", DESCENDING)], name="ix_date_id"),
+            IndexModel([("status", ASCENDING), ("date", DESCENDING), ("id", DESCENDING)], name="ix_status_date_id"),
+            IndexModel([("source", ASCENDING), ("date", DESCENDING), ("id", DESCENDING)], name="ix_source_date_id"),
+            IndexModel([("lead_id", ASCENDING)], name="ix_lead_id", sparse=True),
+        ],
+    },
+    "expenses": {
+        "version": 2,
+        "indexes": [
+            IndexModel([("id", ASCENDING)], name="ix_id", unique=True),
+            IndexModel([("linked_revenue_id", ASCENDING)], name="ix_linked_revenue_id", sparse=True),
+            IndexModel([("date", DESCENDING), ("id", DESCENDING)], name="ix_date_id"),
+            IndexModel([("category", ASCENDING), ("date", DESCENDING), ("id", DESCENDING)], name="ix_category_date_id"),
+        ],
+    },
+    "ledgers": {
+        "version": 1,
+        "indexes": [
+            IndexModel([("reference_id", ASCENDING)], name="ix_reference_id"),
+            IndexModel([("account", ASCENDING), ("date", DESCENDING)], name="ix_account_date"),
+            IndexModel([("reference_type", ASCENDING), ("reference_id", ASCENDING)], name="ix_reference_type_reference_id"),
+            IndexModel([("date", DESCENDING)], name="ix_date"),
+        ],
+    },
+    "gst_records": {
+        "version": 1,
+        "indexes": [
+            IndexModel([("reference_id", ASCENDING), ("date", ASCENDING)], name="ix_reference_id_date"),
+            IndexModel([("date", ASCENDING)], name="ix_date"),
+        ],
+    },
+    "accounts": {
+        "version": 1,
+        "indexes": [
+            IndexModel([("name", ASCENDING)], name="ix_name", unique=True),
+        ],
+    },
+    "leads": {
+        "version": 3,
+        "indexes": [
+            IndexModel([("lead_id", ASCENDING)], name="ix_lead_id"),
+            IndexModel([("referral_code", ASCENDING)], name="ix_referral_code"),
+            # Lead search (see crm/search.py); name and phone keys also give the newest-first order
+            IndexModel([("search_keys.name_tokens", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                       name="ix_search_name_tokens_created_at_id"),
+            IndexModel([("search_keys.phones", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                       name="ix_search_phones_created_at_id"),
+            IndexModel([("search_keys.email", ASCENDING)], name="ix_search_email", sparse=True),
+            # Keyset pagination on (created_at, _id), optionally filtered by status
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="ix_created_at_id"),
+            IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="ix_status_created_at_id"),
+            IndexModel([("travel_date", ASCENDING)], name="ix_travel_date", sparse=True),
+        ],
+    },
+    "reminders": {
+        "version": 1,
+        "indexes": [
+            IndexModel([("status", ASCENDING), ("date", ASCENDING)], name="ix_status_date"),
+            IndexModel([("lead_id", ASCENDING)], name="ix_lead_id", sparse=True),
+        ],
+    },
+    "activity_logs": {
+        "version": 2,
+        "indexes": [
+            # TTL index: also serves the newest-first listing
+            IndexModel([("timestamp", DESCENDING)], name="ix_timestamp_ttl",
+                       expireAfterSeconds=ACTIVITY_LOG_RETENTION_DAYS * 86400),
+            IndexModel([("module", ASCENDING), ("timestamp", DESCENDING)], name="ix_module_timestamp"),
+        ],
+    },
+    "activity_log_counters": {
+        "version": 1,
+        "indexes": [
+            IndexModel([("day", ASCENDING), ("module", ASCENDING), ("action", ASCENDING)], name="ix_day_module_action", unique=True),
+        ],
+    },
+    "monthly_rollups": {
+        "version": 1,
+        "indexes": [
+            IndexModel([("month", ASCENDING), ("type", ASCENDING), ("key", ASCENDING)], name="ix_month_type_key", unique=True),
+        ],
+    },
+    "jobs": {
+        "version": 2,
+        "indexes": [
+            IndexModel([("id", ASCENDING)], name="ix_id", unique=True),
+            # One active job per type, across every process
+            IndexModel([("type", ASCENDING)], name="ix_type_active", unique=True,
+                       partialFilterExpression={"active": True}),
+            IndexModel([("type", ASCENDING), ("status", ASCENDING)], name="ix_type_status"),
+            IndexModel([("created_at", DESCENDING)], name="ix_created_at"),
+        ],
+    },
+    "users": {
+        "version": 1,
+        "indexes": [
+            IndexModel([("username", ASCENDING)], name="ix_username", unique=True),
+        ],
+    },
+    "vendors": {
+        "version": 1,
+        "indexes": [
+            IndexModel([("id", ASCENDING)], name="ix_id"),
+        ],
+    },
+    "bank_accounts": {
+        "version": 1,
+        "indexes": [
+            IndexModel([("id", ASCENDING)], name="ix_id"),
+        ],
+    },
+}
+
+
+class IndexManager:
+    def __init__(self, db, specs: Dict[str, Dict[str, Any]] = None):
+        self.db = db
+        self.specs = specs if specs is not None else INDEX_SPECS
+        self.migrations = db.index_migrations
+
+    def _declared_names(self, collection_name: str) -> List[str]:
+        return [index.document["name"] for index in self.specs[collection_name]["indexes"]]
+
+    async def ensure_indexes(self) -> Dict[str, Any]:
+        """Create (or migrate) every declared index. Safe to run on each startup."""
+        results = {}
+        for collection_name in self.specs:
+            try:
+                results[collection_name] = await self.ensure_collection_indexes(collection_name)
+            except Exception as e:
+                # A failed build (e.g. duplicate keys for a unique index) must not stop the app
+                print(f"Warning: Failed to ensure indexes for {collection_name}: {e}")
+                results[collection_name] = {"status": "failed", "error": str(e)}
+        return results
+
+    async def ensure_collection_indexes(self, collection_name: str) -> Dict[str, Any]:
+        """Bring one collection's indexes up to its declared spec version"""
+        spec = self.specs[collection_name]
+        collection = self.db[collection_name]
+
+        applied = await self.migrations.find_one({"collection": collection_name})
+        applied_version = applied.get("version", 0) if applied else 0
+
+        existing = await collection.index_information()
+        declared = self._declared_names(collection_name)
+        missing = [name for name in declared if name not in existing]
+
+        # A changed TTL (e.g. new retention setting) is applied in place
+        ttl_updated = []
+        for index in spec["indexes"]:
+            name = index.document["name"]
+            ttl = index.document.get("expireAfterSeconds")
+            if ttl is not None and name in existing and existing[name].get("expireAfterSeconds") != ttl:
+                await self.db.command("collMod", collection_name, index={"name": name, "expireAfterSeconds": ttl})
+                ttl_updated.append(name)
+        
+        if applied_version == spec["version"] and not missing:
+            return {"status": "up_to_date", "version": applied_version, "ttl_updated": ttl_updated}
+
+        # Drop managed indexes that are no longer part of the spec
+        dropped = []
+        if applied_version != spec["version"]:
+            for name in existing:
+                if name.startswith(INDEX_PREFIX) and name not in declared:
+                    await collection.drop_index(name)
+                    dropped.append(name)
+
+        # create_indexes is idempotent for identical specs; builds run in the background
+        indexes = [
+            IndexModel(index.document["key"].items(), background=True,
+                       **{k: v for k, v in index.document.items() if k not in ("key", "background")})
+            for index in spec["indexes"]
+            if index.document["name"] in missing
+        ]
+        created = await collection.create_indexes(indexes) if indexes else []
+
+        await self.migrations.update_one(
+            {"collection": collection_name},
+            {"$set": {
+                "version": spec["version"],
+                "indexes": declared,
+                "applied_at": datetime.now(timezone.utc).isoformat()
+            }},
+            upsert=True
+        )
+
+        return {
+            "status": "migrated",
+            "from_version": applied_version,
+            "version": spec["version"],
+            "created": created,
+            "dropped": dropped,
+            "ttl_updated": ttl_updated
+        }
+
+    async def get_report(self) -> Dict[str, Any]:
+        """Report missing, unused and unmanaged indexes per collection"""
+        report = {}
+        for collection_name in self.specs:
+            collection = self.db[collection_name]
+            declared = self._declared_names(collection_name)
+            try:
+                existing = await collection.index_information()
+            except Exception as e:
+                report[collection_name] = {"error": str(e)}
+                continue
+
+            # $indexStats counts index usage since the last server restart
+            usage = {}
+            try:
+                stats = await collection.aggregate([{"$indexStats": {}}]).to_list(None)
+                usage = {s["name"]: s.get("accesses", {}).get("ops", 0) for s in stats}
+            except Exception:
+                pass
+
+            applied = await self.migrations.find_one({"collection": collection_name}, {"_id": 0})
+
+            report[collection_name] = {
+                "declared_version": self.specs[collection_name]["version"],
+                "applied_version": applied.get("version", 0) if applied else 0,
+                "missing": [name for name in declared if name not in existing],
+                "unused": [name for name in existing if name != "_id_" and usage.get(name, None) == 0],
+                "unmanaged": [name for name in existing if name != "_id_" and name not in declared],
+                "usage": usage
+            }
+        return report
@@ -0,0 +1,266 @@
+import os
+import uuid
+import socket
+import asyncio
+from datetime import datetime, timezone, timedelta
+from typing import Optional, Dict, List, Any, Callable, Awaitable
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from metrics import current_request, current_operation
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+ACTIVE_STATUSES = [JOB_QUEUED, JOB_RUNNING]
+
+# Jobs executed at the same time by one process
+DEFAULT_JOB_CONCURRENCY = 2
+# Seconds between heartbeats of a process' active jobs
+DEFAULT_JOB_HEARTBEAT_INTERVAL = 15
+# Seconds without a heartbeat after which an active job is considered orphaned
+DEFAULT_JOB_HEARTBEAT_TIMEOUT = 90
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once cancellation has been requested"""
+
+
+class JobConflict(Exception):
+    """A job of the same type is already active with different parameters"""
+
+    def __init__(self, job: Dict):
+        super().__init__(f"A {job['type']} job is already {job['status']} with different parameters")
+        self.job = job
+
+
+class Job:
+    """Handle passed to a running job for reporting progress"""
+
+    def __init__(self, runner: "JobRunner", job_id: str):
+        self.runner = runner
+        self.id = job_id
+
+    async def progress(self, done: int, total: Optional[int] = None, **counters):
+        """Persist progress; raises JobCancelled if the job was cancelled from another process"""
+        update = {"progress.done": done, "updated_at": _now()}
+        if total is not None:
+            update["progress.total"] = total
+        for name, value in counters.items():
+            update[f"progress.{name}"] = value
+
+        job = await self.runner.collection.find_one_and_update(
+            {"id": self.id},
+            {"$set": update},
+            projection={"_id": 0, "cancel_requested": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if job and job.get("cancel_requested"):
+            raise JobCancelled()
+
+
+class JobRunner:
+    """
+    In-process background jobs persisted in the `jobs` collection.
+
+    At most one job of each type is active at a time across all processes
+    (enforced by a partial unique index on `type` over active jobs);
+    `concurrency` jobs run at once per process. Each job records the
+    process running it (`worker_id`) and a `heartbeat_at` refreshed while it
+    is active, so only jobs whose owner stopped beating are failed as orphans.
+    """
+
+    def __init__(self, db, concurrency: int = None):
+        self.db = db
+        self.collection = db.jobs
+        self.concurrency = concurrency or int(os.getenv("JOB_CONCURRENCY", DEFAULT_JOB_CONCURRENCY))
+        self.heartbeat_interval = float(os.getenv("JOB_HEARTBEAT_INTERVAL", DEFAULT_JOB_HEARTBEAT_INTERVAL))
+        self.heartbeat_timeout = float(os.getenv("JOB_HEARTBEAT_TIMEOUT", DEFAULT_JOB_HEARTBEAT_TIMEOUT))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._semaphore = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    # ============ OWNERSHIP ============
+
+    async def recover(self):
+        """Fail active jobs whose owning process stopped sending heartbeats (crashed or restarted)"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.heartbeat_timeout)).isoformat()
+        result = await self.collection.update_many(
+            {
+                "status": {"$in": ACTIVE_STATUSES},
+                "worker_id": {"$ne": self.worker_id},
+                "$or": [{"heartbeat_at": {"$lt": cutoff}}, {"heartbeat_at": {"$exists": False}}]
+            },
+            {"$set": {
+                "status": JOB_FAILED,
+                "active": False,
+                "error": "Interrupted: the worker running it stopped",
+                "finished_at": _now()
+            }}
+        )
+        if result.modified_count:
+            print(f"Marked {result.modified_count} orphaned jobs as failed")
+
+    def start(self):
+        """Start heartbeating this process' jobs (and reaping other processes' orphans)"""
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._beat())
+
+    async def heartbeat(self):
+        """
+        Refresh this process' active jobs, cancel the ones whose cancellation was
+        requested through another process, and fail other processes' orphans
+        """
+        await self.collection.update_many(
+            {"worker_id": self.worker_id, "status": {"$in": ACTIVE_STATUSES}},
+            {"$set": {"heartbeat_at": _now()}}
+        )
+        # cancel() only reaches the task when it runs in the process serving the request
+        cancelled = await self.collection.find(
+            {"worker_id": self.worker_id, "status": JOB_RUNNING, "cancel_requested": True},
+            {"_id": 0, "id": 1}
+        ).to_list(None)
+        for job in cancelled:
+            task = self._tasks.get(job["id"])
+            if task:
+                task.cancel()
+        await self.recover()
+
+    async def _beat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                print(f"Job heartbeat failed: {e}")
+
+    # ============ JOBS ============
+
+    async def submit(self, job_type: str, func: Callable[[Job], Awaitable[Any]],
+                     user: str = "system", params: Optional[Dict] = None) -> Dict:
+        """
+        Queue func(job) in the background and return the job. An active job of the
+        same type with the same params is returned instead; with different params
+        JobConflict is raised.
+        """
+        params = params or {}
+        for attempt in range(3):
+            job = {
+                "id": str(uuid.uuid4()),
+                "type": job_type,
+                "status": JOB_QUEUED,
+                "active": True,
+                "params": params,
+                "progress": {"done": 0, "total": None},
+                "result": None,
+                "error": None,
+                "cancel_requested": False,
+                "worker_id": self.worker_id,
+                "heartbeat_at": _now(),
+                "created_by": user,
+                "created_at": _now(),
+                "started_at": None,
+                "finished_at": None
+            }
+            try:
+                # The partial unique index on active jobs makes this the atomic claim
+                await self.collection.insert_one(job)
+                break
+            except DuplicateKeyError:
+                active = await self.collection.find_one({"type": job_type, "active": True}, {"_id": 0})
+                if active is None:
+                    if attempt == 2:
+                        raise
+                    continue  # It finished in between; claim again
+                if active.get("params", {}) != params:
+                    raise JobConflict(active)
+                return active
+        job.pop("_id", None)
+
+        task = asyncio.create_task(self._run(job["id"], job_type, func))
+        self._tasks[job["id"]] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job["id"], None))
+        return job
+
+    async def _finish(self, job_id: str, status: str, **fields):
+        await self.collection.update_one(
+            {"id": job_id},
+            {"$set": {"status": status, "active": False, "finished_at": _now(), **fields}}
+        )
+
+    async def _run(self, job_id: str, job_type: str, func: Callable[[Job], Awaitable[Any]]):
+        # Attribute the job's MongoDB commands to the job, not to the request that submitted it
+        current_request.set(None)
+        current_operation.set(f"job:{job_type}")
+        try:
+            async with self.semaphore:
+                job = await self.collection.find_one_and_update(
+                    {"id": job_id, "status": JOB_QUEUED},
+                    {"$set": {"status": JOB_RUNNING, "started_at": _now(), "heartbeat_at": _now()}}
+                )
+                if not job:
+                    return  # cancelled while queued
+                result = await func(Job(self, job_id))
+            await self._finish(job_id, JOB_SUCCEEDED, result=result)
+        except (asyncio.CancelledError, JobCancelled):
+            await self._finish(job_id, JOB_CANCELLED)
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            await self._finish(job_id, JOB_FAILED, error=str(e))
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await self.collection.find_one({"id": job_id}, {"_id": 0})
+
+    async def list(self, limit: int = 50, job_type: Optional[str] = None) -> List[Dict]:
+        query = {"type": job_type} if job_type else {}
+        return await self.collection.find(query, {"_id": 0}).sort("created_at", -1).limit(limit).to_list(None)
+
+    async def cancel(self, job_id: str) -> Optional[Dict]:
+        """
+        Request cancellation. A queued job is cancelled immediately; a running one at its
+        next await when it runs in this process, else at its owner's next heartbeat
+        """
+        job = await self.collection.find_one_and_update(
+            {"id": job_id, "status": {"$in": ACTIVE_STATUSES}},
+            {"$set": {"cancel_requested": True}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if not job:
+            return await self.get(job_id)
+
+        if job["status"] == JOB_QUEUED:
+            await self.collection.update_one(
+                {"id": job_id, "status": JOB_QUEUED},
+                {"$set": {"status": JOB_CANCELLED, "active": False, "finished_at": _now()}}
+            )
+
+        task = self._tasks.get(job_id)
+        if task:
+            task.cancel()
+        return await self.get(job_id)
+
+    async def shutdown(self):
+        """Stop heartbeating and cancel the jobs still running in this process"""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
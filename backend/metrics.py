@@ -0,0 +1,234 @@
+import os
+import time
+import threading
+from contextvars import ContextVar
+from typing import Optional, Dict, List, Tuple
+from pymongo import monitoring
+
+# Histogram buckets (upper bounds); an implicit +Inf bucket is always added
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+COMMAND_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+# Label used for requests that matched no route (keeps raw paths out of the label set)
+UNMATCHED_ROUTE = "unmatched"
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestStats:
+    """Mongo work attributed to the HTTP request being served"""
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.mongo_commands = 0
+        self.mongo_seconds = 0.0
+
+
+# Set by the middleware for the duration of a request; Motor copies the context
+# into its executor threads, so the command listener sees the same object
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+# Name of the background operation (e.g. a job) running outside any request
+current_operation: ContextVar[Optional[str]] = ContextVar("current_operation", default=None)
+
+
+def current_caller() -> str:
+    """Handler (module.function) of the current request, else the background operation"""
+    stats = current_request.get()
+    endpoint = stats.scope.get("endpoint") if stats and stats.scope else None
+    if endpoint is not None:
+        return f"{endpoint.__module__}.{getattr(endpoint, '__qualname__', endpoint.__class__.__name__)}"
+    return current_operation.get() or "background"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...], buckets: Tuple):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., sum, count]
+        self.values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, labels: Tuple, value: float):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.values.items()):
+            for i, bound in enumerate(self.buckets):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {series[i]}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {series[-1]}")
+        return lines
+
+
+class Metrics:
+    """
+    In-process metrics registry rendered in the Prometheus text format.
+    Written from the event loop (HTTP) and from Motor's executor threads (Mongo), hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter(
+            "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status"))
+        self.request_seconds = Histogram(
+            "http_request_duration_seconds", "HTTP request latency", ("method", "route"), LATENCY_BUCKETS)
+        self.response_bytes = Histogram(
+            "http_response_size_bytes", "HTTP response body size", ("method", "route"), SIZE_BUCKETS)
+        self.request_mongo_commands = Histogram(
+            "http_request_mongo_commands", "MongoDB round trips per HTTP request", ("method", "route"), COMMAND_COUNT_BUCKETS)
+        self.request_mongo_seconds = Histogram(
+            "http_request_mongo_seconds", "Time spent in MongoDB per HTTP request", ("method", "route"), LATENCY_BUCKETS)
+        self.mongo_commands = Counter(
+            "mongo_commands_total", "MongoDB commands by collection and outcome", ("command", "collection", "outcome"))
+        self.mongo_seconds = Histogram(
+            "mongo_command_duration_seconds", "MongoDB command latency", ("command", "collection"), LATENCY_BUCKETS)
+        self.started_at = time.time()
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, size: int, stats: RequestStats):
+        labels = (method, route)
+        with self._lock:
+            self.requests.inc((method, route, str(status)))
+            self.request_seconds.observe(labels, seconds)
+            self.response_bytes.observe(labels, size)
+            self.request_mongo_commands.observe(labels, stats.mongo_commands)
+            self.request_mongo_seconds.observe(labels, stats.mongo_seconds)
+
+    def observe_command(self, command: str, collection: str, seconds: float, failed: bool = False):
+        with self._lock:
+            self.mongo_commands.inc((command, collection, "failed" if failed else "succeeded"))
+            self.mongo_seconds.observe((command, collection), seconds)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP process_uptime_seconds Seconds since the metrics registry was created",
+                "# TYPE process_uptime_seconds gauge",
+                f"process_uptime_seconds {time.time() - self.started_at}",
+            ]
+            for metric in (self.requests, self.request_seconds, self.response_bytes,
+                           self.request_mongo_commands, self.request_mongo_seconds,
+                           self.mongo_commands, self.mongo_seconds):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def command_collection(command_name: str, command: dict) -> str:
+    """Collection a command targets ('' for database / admin commands)"""
+    if command_name == "getMore":
+        target = command.get("collection")
+    else:
+        target = command.get(command_name)
+    return target if isinstance(target, str) else ""
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every command sent by the client and attributes it to the current HTTP request"""
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+        self._collections: Dict[Tuple, str] = {}
+
+    def started(self, event):
+        self._collections[(event.connection_id, event.request_id)] = command_collection(event.command_name, event.command)
+
+    def _finish(self, event, failed: bool):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        seconds = event.duration_micros / 1e6
+        self.metrics.observe_command(event.command_name, collection, seconds, failed)
+        stats = current_request.get()
+        if stats is not None:
+            stats.mongo_commands += 1
+            stats.mongo_seconds += seconds
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status code, response size and Mongo work per route"""
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        status = 500
+        size = 0
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = scope.get("route")
+            self.metrics.observe_request(
+                scope["method"],
+                getattr(route, "path", None) or UNMATCHED_ROUTE,
+                status,
+                time.perf_counter() - start,
+                size,
+                stats
+            )
+
+
+def metrics_enabled() -> bool:
+    return os.getenv("METRICS_ENABLED", "true").lower() not in ("0", "false", "no")
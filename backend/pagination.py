@@ -0,0 +1,82 @@
+import base64
+from typing import Optional, List, Dict, Any
+from bson import json_util
+
+# Hard cap on a single page
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the sort-key values of the last returned row as an opaque cursor"""
+    raw = json_util.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a cursor produced by encode_cursor (raises ValueError if malformed)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def keyset_filter(sort_fields: List[str], values: List[Any], direction: int = -1) -> Dict:
+    """
+    Filter selecting rows strictly after `values` in (sort_fields) order.
+    For ('date', 'id') descending this is:
+        date < d  OR  (date == d AND id < i)
+    """
+    if len(values) != len(sort_fields):
+        raise ValueError("Invalid cursor")
+
+    op = "$lt" if direction < 0 else "$gt"
+    clauses = []
+    for i, field in enumerate(sort_fields):
+        clause = {sort_fields[j]: values[j] for j in range(i)}
+        clause[field] = {op: values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def build_projection(fields: Optional[str], required: List[str]) -> Dict[str, int]:
+    """Turn a comma separated `fields=` parameter into a projection (sort keys always included)"""
+    projection = {"_id": 0}
+    if not fields:
+        return projection
+    for name in [f.strip() for f in fields.split(",")] + required:
+        if name and name != "_id" and not name.startswith("$"):
+            projection[name] = 1
+    return projection
+
+
+async def fetch_page(
+    collection,
+    query: Dict,
+    sort_fields: List[str],
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict] = None,
+    direction: int = -1
+) -> Dict[str, Any]:
+    """Run one keyset-paginated query; returns items plus the cursor for the next page"""
+    if cursor:
+        after = keyset_filter(sort_fields, decode_cursor(cursor), direction)
+        query = {"$and": [query, after]} if query else after
+
+    limit = min(limit, MAX_PAGE_SIZE)
+    # Fetch one extra row to know whether another page exists
+    docs = await collection.find(query, projection).sort(
+        [(field, direction) for field in sort_fields]
+    ).limit(limit + 1).to_list(None)
+
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = None
+    if has_more and docs:
+        next_cursor = encode_cursor([docs[-1].get(field) for field in sort_fields])
+
+    return {"items": docs, "next_cursor": next_cursor, "has_more": has_more}
@@ -0,0 +1,185 @@
+import os
+import time
+import uuid
+import marshal
+import cProfile
+import pstats
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional, Dict, List, Callable
+from urllib.parse import parse_qs
+
+# Header / query flag asking for a profiled request
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_FLAG = "__profile"
+
+# Profiled requests allowed per window (per process)
+DEFAULT_PROFILE_RATE_LIMIT = 5
+DEFAULT_PROFILE_WINDOW_SECONDS = 60
+# Profiles kept in memory (oldest dropped first)
+DEFAULT_PROFILE_STORE_SIZE = 20
+
+
+class RequestProfiler:
+    """
+    Runs opted-in requests under cProfile and keeps their stats by profile id.
+
+    cProfile hooks the event loop thread, so a profile also includes whatever
+    other requests ran on the loop meanwhile; only one request is profiled at
+    a time and at most `rate_limit` per window, which keeps it safe to leave
+    enabled in production.
+    """
+
+    def __init__(self, rate_limit: int = None, window_seconds: float = None, max_entries: int = None):
+        self.rate_limit = rate_limit or int(os.getenv("PROFILE_RATE_LIMIT", DEFAULT_PROFILE_RATE_LIMIT))
+        self.window_seconds = window_seconds or float(os.getenv("PROFILE_WINDOW_SECONDS", DEFAULT_PROFILE_WINDOW_SECONDS))
+        self.max_entries = max_entries or int(os.getenv("PROFILE_STORE_SIZE", DEFAULT_PROFILE_STORE_SIZE))
+        self._lock = threading.Lock()
+        self._active = False
+        self._started: deque = deque()
+        self._profiles: Dict[str, Dict] = {}
+
+    def acquire(self) -> Optional[str]:
+        """None when a profile may start, else the reason it may not ('busy' / 'rate_limited')"""
+        now = time.monotonic()
+        with self._lock:
+            if self._active:
+                return "busy"
+            while self._started and now - self._started[0] > self.window_seconds:
+                self._started.popleft()
+            if len(self._started) >= self.rate_limit:
+                return "rate_limited"
+            self._started.append(now)
+            self._active = True
+        return None
+
+    def release(self):
+        with self._lock:
+            self._active = False
+
+    def store(self, profile_id: str, profile: cProfile.Profile, **info):
+        stats = pstats.Stats(profile)
+        entry = {
+            "id": profile_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            **info,
+            "total_calls": stats.total_calls,
+            "cpu_seconds": round(stats.total_tt, 6),
+            # Same layout as a .prof file (pstats.dump_stats)
+            "_stats": marshal.dumps(stats.stats),
+        }
+        with self._lock:
+            self._profiles[profile_id] = entry
+            while len(self._profiles) > self.max_entries:
+                self._profiles.pop(next(iter(self._profiles)))
+
+    # ============ QUERIES ============
+
+    @staticmethod
+    def _public(entry: Dict) -> Dict:
+        return {key: value for key, value in entry.items() if not key.startswith("_")}
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            entries = list(self._profiles.values())
+        return [self._public(entry) for entry in reversed(entries)]
+
+    def get(self, profile_id: str, limit: int = 50, sort: str = "cumulative") -> Optional[Dict]:
+        """Profile summary with its top functions by cumulative (or own) time"""
+        with self._lock:
+            entry = self._profiles.get(profile_id)
+        if entry is None:
+            return None
+
+        functions = []
+        for (filename, line, name), (primitive_calls, calls, own, cumulative, _) in marshal.loads(entry["_stats"]).items():
+            functions.append({
+                "function": name,
+                "file": filename,
+                "line": line,
+                "calls": calls,
+                "primitive_calls": primitive_calls,
+                "own_seconds": round(own, 6),
+                "cumulative_seconds": round(cumulative, 6),
+            })
+        key = "own_seconds" if sort == "own" else "cumulative_seconds"
+        functions.sort(key=lambda function: function[key], reverse=True)
+        return {**self._public(entry), "functions": functions[:limit]}
+
+    def dump(self, profile_id: str) -> Optional[bytes]:
+        """Raw stats in the .prof format (snakeviz, flameprof, gprof2dot, pstats)"""
+        with self._lock:
+            entry = self._profiles.get(profile_id)
+        return entry["_stats"] if entry else None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware: a request carrying `X-Profile: 1` (or `?__profile=1`) from an
+    admin runs under cProfile. The response carries `X-Profile-Id`, or
+    `X-Profile-Status` when the profile was refused.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler, authorize: Callable[[Optional[str]], Optional[str]]):
+        self.app = app
+        self.profiler = profiler
+        # Authorization header -> admin username, or None
+        self.authorize = authorize
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return value not in (b"", b"0", b"false")
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        return query.get(PROFILE_QUERY_FLAG, ["0"])[0] not in ("", "0", "false")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1") or None
+        user = self.authorize(authorization)
+        refused = "forbidden" if user is None else self.profiler.acquire()
+        if refused:
+            async def send_refused(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-status", refused.encode())]
+                await send(message)
+
+            await self.app(scope, receive, send_refused)
+            return
+
+        profile_id = str(uuid.uuid4())
+        status = 500
+
+        async def send_profiled(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, send_profiled)
+            finally:
+                profile.disable()
+            route = scope.get("route")
+            self.profiler.store(
+                profile_id,
+                profile,
+                method=scope["method"],
+                path=scope["path"],
+                route=getattr(route, "path", None),
+                status=status,
+                user=user,
+                wall_seconds=round(time.perf_counter() - start, 6),
+            )
+        finally:
+            self.profiler.release()
@@ -0,0 +1,195 @@
+import os
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional, Dict, List, Callable, Awaitable
+from pymongo import UpdateOne
+
+# Source documents turned into ledger lines per bulk insert
+REBUILD_BATCH_SIZE = 1000
+
+# Checkpoint document in the rebuild_state collection
+CHECKPOINT_ID = 'accounting'
+
+# What each rebuild stream reads
+REBUILD_SOURCES = {
+    'revenues': {"status": "Received", "received_amount": {"$gt": 0}},
+    'expenses': {},
+}
+
+
+class AccountingRebuildService:
+    """
+    Regenerates ledgers, GST records and account balances from revenues and expenses.
+
+    Revenues and expenses are streamed concurrently by _id; each batch's ledger
+    lines and GST records are built in memory and written with unordered
+    insert_many. The last _id written per stream is checkpointed, so an
+    interrupted rebuild resumes where it stopped. Balances are computed at the
+    end with one aggregation over the ledgers.
+    """
+
+    def __init__(self, db, accounting, batch_size: int = None):
+        self.db = db
+        self.accounting = accounting
+        self.batch_size = batch_size or int(os.getenv("REBUILD_BATCH_SIZE", REBUILD_BATCH_SIZE))
+        self.state = db.rebuild_state
+
+    # ============ CHECKPOINTS ============
+
+    async def get_checkpoint(self) -> Optional[Dict]:
+        return await self.state.find_one({'_id': CHECKPOINT_ID})
+
+    async def _save_checkpoint(self, **fields):
+        fields['updated_at'] = datetime.now(timezone.utc).isoformat()
+        await self.state.update_one({'_id': CHECKPOINT_ID}, {'$set': fields}, upsert=True)
+
+    async def _start(self) -> Dict:
+        """Clear existing accounting data and open a fresh checkpoint"""
+        await asyncio.gather(
+            self.db.ledgers.delete_many({}),
+            self.db.gst_records.delete_many({}),
+        )
+        checkpoint = {
+            'status': 'running',
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'streams': {name: {'last_id': None, 'processed': 0, 'done': False} for name in REBUILD_SOURCES},
+        }
+        await self.state.replace_one({'_id': CHECKPOINT_ID}, checkpoint, upsert=True)
+        return checkpoint
+
+    # ============ BUILD ============
+
+    def _build_entries(self, collection_name: str, doc: dict) -> Dict[str, List[dict]]:
+        if collection_name == 'revenues':
+            entry = self.accounting.build_revenue_ledger_entry(doc) or {}
+            return {'ledgers': entry.get('ledgers', []), 'gst_records': entry.get('gst_records', [])}
+
+        entry = self.accounting.build_expense_ledger_entry(doc)
+        gst_records = []
+        if doc.get('purchase_type') == 'Purchase for Resale' and doc.get('gst_rate', 0) > 0:
+            gst_records.append(self.accounting.build_input_gst_record(doc))
+        return {'ledgers': entry['ledgers'], 'gst_records': gst_records}
+
+    async def _write(self, batch: List[dict], entries: Dict[str, List[dict]], replace: bool):
+        if replace:
+            # First batch after a resume may already be partly written
+            reference_ids = [doc['id'] for doc in batch]
+            await asyncio.gather(
+                self.db.ledgers.delete_many({'reference_id': {'$in': reference_ids}}),
+                self.db.gst_records.delete_many({'reference_id': {'$in': reference_ids}}),
+            )
+        await asyncio.gather(*[
+            self.db[collection_name].insert_many(docs, ordered=False)
+            for collection_name, docs in entries.items() if docs
+        ])
+
+    async def _rebuild_stream(self, collection_name: str, stream_state: Dict, report: Callable[[], Awaitable]):
+        """Stream one source collection in _id order, writing and checkpointing batch by batch"""
+        if stream_state['done']:
+            return
+
+        query = dict(REBUILD_SOURCES[collection_name])
+        resumed = stream_state['last_id'] is not None
+        if resumed:
+            query['_id'] = {'$gt': stream_state['last_id']}
+
+        cursor = self.db[collection_name].find(query).sort('_id', 1).batch_size(self.batch_size)
+        batch = []
+        entries = {'ledgers': [], 'gst_records': []}
+
+        async def flush():
+            nonlocal batch, entries, resumed
+            await self._write(batch, entries, replace=resumed)
+            resumed = False
+            stream_state['last_id'] = batch[-1]['_id']
+            stream_state['processed'] += len(batch)
+            await self._save_checkpoint(**{f'streams.{collection_name}': stream_state})
+            batch = []
+            entries = {'ledgers': [], 'gst_records': []}
+            await report()
+
+        async for doc in cursor:
+            batch.append(doc)
+            for name, docs in self._build_entries(collection_name, doc).items():
+                entries[name].extend(docs)
+            if len(batch) >= self.batch_size:
+                await flush()
+        if batch:
+            await flush()
+
+        stream_state['done'] = True
+        await self._save_checkpoint(**{f'streams.{collection_name}': stream_state})
+
+    # ============ BALANCES ============
+
+    async def recompute_balances(self) -> int:
+        """Set every account balance to sum(debit) - sum(credit) of its ledger lines"""
+        pipeline = [
+            {
+                "$group": {
+                    "_id": "$account",
+                    # Vendor and partial payment lines carry no account_type ($max skips missing values)
+                    "type": {"$max": "$account_type"},
+                    # Fallback type, the way apply_balance_deltas types auto-created accounts
+                    "first_side": {"$first": {
+                        "$cond": [{"$gt": [{"$ifNull": ["$debit", 0]}, 0]}, "Expenses", "Income"]
+                    }},
+                    "balance": {"$sum": {"$subtract": [{"$ifNull": ["$debit", 0]}, {"$ifNull": ["$credit", 0]}]}}
+                }
+            }
+        ]
+        totals = await self.db.ledgers.aggregate(pipeline).to_list(None)
+
+        # Accounts only referenced by ledger lines (auto-created vendor / expense accounts)
+        await self.accounting.ensure_accounts({
+            total['_id']: total['type'] or total['first_side'] for total in totals
+        })
+
+        operations = [
+            UpdateOne({'name': total['_id']}, {'$set': {'balance': total['balance']}})
+            for total in totals
+        ]
+        await self.db.accounts.update_many(
+            {'name': {'$nin': [total['_id'] for total in totals]}},
+            {'$set': {'balance': 0.0}}
+        )
+        if operations:
+            await self.db.accounts.bulk_write(operations, ordered=False)
+        return len(totals)
+
+    # ============ RUN ============
+
+    async def rebuild(self, progress: Callable[..., Awaitable] = None, restart: bool = False) -> Dict:
+        """Run (or resume) a rebuild; `progress(done, total, **counters)` is awaited after every batch"""
+        checkpoint = await self.get_checkpoint()
+        resuming = bool(checkpoint) and checkpoint.get('status') == 'running' and not restart
+        if not resuming:
+            checkpoint = await self._start()
+
+        streams = checkpoint['streams']
+        total = sum(await asyncio.gather(*[
+            self.db[name].count_documents(query) for name, query in REBUILD_SOURCES.items()
+        ]))
+
+        async def report():
+            if progress:
+                await progress(
+                    sum(stream['processed'] for stream in streams.values()), total,
+                    **{name: stream['processed'] for name, stream in streams.items()}
+                )
+
+        await asyncio.gather(*[
+            self._rebuild_stream(name, streams[name], report) for name in REBUILD_SOURCES
+        ])
+
+        accounts_updated = await self.recompute_balances()
+        await self._save_checkpoint(status='completed', finished_at=datetime.now(timezone.utc).isoformat())
+        await report()
+
+        return {
+            "message": "Accounting data rebuilt successfully",
+            "resumed": resuming,
+            "revenues_processed": streams['revenues']['processed'],
+            "expenses_processed": streams['expenses']['processed'],
+            "accounts_updated": accounts_updated
+        }
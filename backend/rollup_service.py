@@ -0,0 +1,173 @@
+from datetime import datetime, timezone
+from typing import Optional, Dict, List, Tuple
+from pymongo import UpdateOne
+
+
+class RollupService:
+    """
+    Materialized per-month totals kept in the monthly_rollups collection.
+
+    One document per (month, type, key):
+    - type 'revenue', key = source,   value = received amount of 'Received' revenues
+    - type 'expense', key = category, value = expense amount
+    Writers apply $inc deltas; rebuild() regenerates everything from scratch.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.monthly_rollups
+
+    # ============ CONTRIBUTIONS ============
+
+    @staticmethod
+    def _revenue_contribution(revenue: Optional[dict]) -> Dict[Tuple[str, str, str], float]:
+        if not revenue or revenue.get('status') != 'Received':
+            return {}
+        month = (revenue.get('date') or '')[:7]
+        # An explicit None counts as 'Other', like $ifNull in rebuild()
+        source = revenue.get('source')
+        if source is None:
+            source = 'Other'
+        return {(month, 'revenue', source): revenue.get('received_amount', 0) or 0}
+
+    @staticmethod
+    def _expense_contribution(expense: Optional[dict]) -> Dict[Tuple[str, str, str], float]:
+        if not expense:
+            return {}
+        month = (expense.get('date') or '')[:7]
+        category = expense.get('category')
+        if category is None:
+            category = 'Other'
+        return {(month, 'expense', category): expense.get('amount', 0) or 0}
+
+    async def _apply(self, old: Dict, new: Dict):
+        await self._apply_deltas(self._diff(old, new))
+
+    @staticmethod
+    def _diff(old: Dict, new: Dict, deltas: Dict = None) -> Dict:
+        deltas = {} if deltas is None else deltas
+        for key, value in old.items():
+            deltas[key] = deltas.get(key, 0) - value
+        for key, value in new.items():
+            deltas[key] = deltas.get(key, 0) + value
+        return deltas
+
+    async def _apply_deltas(self, deltas: Dict):
+        operations = []
+        for (month, type, key), delta in deltas.items():
+            if delta == 0:
+                continue
+            operations.append(UpdateOne(
+                {'month': month, 'type': type, 'key': key},
+                {
+                    '$inc': {'value': delta},
+                    '$set': {'updated_at': datetime.now(timezone.utc).isoformat()}
+                },
+                upsert=True
+            ))
+
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+    async def apply_revenue(self, old: Optional[dict], new: Optional[dict]):
+        """Apply a revenue create (old=None), update or delete (new=None)"""
+        await self._apply(self._revenue_contribution(old), self._revenue_contribution(new))
+
+    async def apply_expense(self, old: Optional[dict], new: Optional[dict]):
+        """Apply an expense create (old=None), update or delete (new=None)"""
+        await self._apply(self._expense_contribution(old), self._expense_contribution(new))
+
+    async def apply(self, revenues: List[Tuple[Optional[dict], Optional[dict]]] = (),
+                    expenses: List[Tuple[Optional[dict], Optional[dict]]] = ()):
+        """Apply several (old, new) revenue and expense changes in one bulk write"""
+        deltas = {}
+        for old, new in revenues:
+            self._diff(self._revenue_contribution(old), self._revenue_contribution(new), deltas)
+        for old, new in expenses:
+            self._diff(self._expense_contribution(old), self._expense_contribution(new), deltas)
+        await self._apply_deltas(deltas)
+
+    # ============ REBUILD ============
+
+    async def rebuild(self) -> Dict:
+        """Regenerate monthly_rollups from the revenues and expenses collections"""
+        timestamp = datetime.now(timezone.utc).isoformat()
+
+        revenue_pipeline = [
+            {"$match": {"status": "Received"}},
+            {
+                "$group": {
+                    "_id": {"month": {"$substr": ["$date", 0, 7]}, "key": {"$ifNull": ["$source", "Other"]}},
+                    "value": {"$sum": "$received_amount"}
+                }
+            }
+        ]
+        expense_pipeline = [
+            {
+                "$group": {
+                    "_id": {"month": {"$substr": ["$date", 0, 7]}, "key": {"$ifNull": ["$category", "Other"]}},
+                    "value": {"$sum": "$amount"}
+                }
+            }
+        ]
+
+        revenue_groups = await self.db.revenues.aggregate(revenue_pipeline).to_list(None)
+        expense_groups = await self.db.expenses.aggregate(expense_pipeline).to_list(None)
+
+        docs = []
+        for type, groups in (('revenue', revenue_groups), ('expense', expense_groups)):
+            for group in groups:
+                docs.append({
+                    'month': group['_id']['month'],
+                    'type': type,
+                    'key': group['_id']['key'],
+                    'value': group['value'],
+                    'updated_at': timestamp
+                })
+
+        await self.collection.delete_many({})
+        if docs:
+            await self.collection.insert_many(docs)
+
+        return {"rollups": len(docs), "rebuilt_at": timestamp}
+
+    async def ensure_built(self):
+        """Build the rollups once if the collection has never been populated"""
+        if await self.collection.find_one({}, {'_id': 1}):
+            return
+        if await self.db.revenues.find_one({}, {'_id': 1}) or await self.db.expenses.find_one({}, {'_id': 1}):
+            await self.rebuild()
+
+    # ============ READS ============
+
+    async def get_rollups(self, month_from: Optional[str] = None, month_to: Optional[str] = None) -> List[dict]:
+        query = {}
+        if month_from or month_to:
+            query['month'] = {}
+            if month_from:
+                query['month']['$gte'] = month_from
+            if month_to:
+                query['month']['$lte'] = month_to
+        return await self.collection.find(query, {'_id': 0}).to_list(None)
+
+    async def get_monthly_totals(self) -> Dict[str, Dict[str, float]]:
+        """Revenue and expense totals per month"""
+        pipeline = [
+            {"$group": {"_id": {"month": "$month", "type": "$type"}, "value": {"$sum": "$value"}}}
+        ]
+        groups = await self.collection.aggregate(pipeline).to_list(None)
+
+        totals = {}
+        for group in groups:
+            month = group['_id']['month']
+            totals.setdefault(month, {'revenue': 0.0, 'expense': 0.0})
+            totals[month][group['_id']['type']] += group['value']
+        return totals
+
+    async def get_breakdown(self, month_from: Optional[str] = None, month_to: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Revenue by source and expense by category for a month range"""
+        breakdown = {'revenue': {}, 'expense': {}}
+        for rollup in await self.get_rollups(month_from, month_to):
+            bucket = breakdown[rollup['type']]
+            bucket[rollup['key']] = bucket.get(rollup['key'], 0) + rollup['value']
+        return breakdown
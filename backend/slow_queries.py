@@ -0,0 +1,266 @@
+import os
+import re
+import uuid
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional, Dict, List, Any
+from bson.regex import Regex
+from pymongo import monitoring
+from metrics import current_caller
+
+# Commands slower than this are recorded
+DEFAULT_SLOW_QUERY_MS = 100
+# Slow operations kept in memory (oldest dropped first)
+DEFAULT_SLOW_QUERY_LOG_SIZE = 500
+
+# Commands that can be re-run under explain
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+# Fields of each explainable command kept for a later explain; everything
+# else (inserted / replacement documents, update bodies, session fields) is dropped
+EXPLAIN_FIELDS = {
+    "find": ("filter", "sort", "projection", "hint", "skip", "limit", "collation"),
+    "aggregate": ("pipeline", "hint", "collation"),
+    "count": ("query", "hint", "skip", "limit", "collation"),
+    "distinct": ("key", "query", "collation"),
+}
+
+# Commands never recorded (monitoring noise, or the recorder's own explain calls)
+IGNORED_COMMANDS = {"explain", "hello", "isMaster", "ismaster", "ping", "endSessions", "killCursors"}
+
+
+def query_shape(value: Any) -> Any:
+    """The filter with every literal replaced by '?', so it can be logged and grouped safely"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [query_shape(value[0])] if value else []
+    if isinstance(value, (re.Pattern, Regex)):
+        return "/?/"
+    return "?"
+
+
+def command_filter(command_name: str, command: dict) -> Any:
+    """The part of a command that decides which documents are read"""
+    if command_name == "find":
+        return command.get("filter", {})
+    if command_name in ("count", "distinct", "findAndModify"):
+        return command.get("query", {})
+    if command_name == "aggregate":
+        return command.get("pipeline", [])
+    if command_name == "update":
+        return [update.get("q", {}) for update in command.get("updates", [])[:1]]
+    if command_name == "delete":
+        return [delete.get("q", {}) for delete in command.get("deletes", [])[:1]]
+    return None
+
+
+def explainable_command(command_name: str, command: dict) -> Optional[dict]:
+    """
+    The read part of a command, enough to explain its plan. Writes are explained
+    as the find of the documents they target, so no write payload is kept.
+    """
+    if command_name not in EXPLAINABLE_COMMANDS:
+        return None
+    collection = command.get(command_name)
+    if command_name == "findAndModify":
+        explained = {"find": collection, "filter": command.get("query", {}), "limit": 1}
+        if command.get("sort"):
+            explained["sort"] = command["sort"]
+        return explained
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes", [])
+        statement = statements[0] if statements else {}
+        explained = {"find": collection, "filter": statement.get("q", {})}
+        if command_name == "update" and not statement.get("multi"):
+            explained["limit"] = 1
+        if command_name == "delete" and statement.get("limit"):
+            explained["limit"] = 1
+        return explained
+
+    explained = {command_name: collection}
+    for field in EXPLAIN_FIELDS[command_name]:
+        if field in command:
+            explained[field] = command[field]
+    if command_name == "aggregate":
+        explained["cursor"] = {}
+    return explained
+
+
+def docs_returned(reply: dict) -> Optional[int]:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        if batch is not None:
+            return len(batch)
+    if isinstance(reply.get("n"), int):
+        return reply["n"]
+    if isinstance(reply.get("values"), list):
+        return len(reply["values"])
+    return None
+
+
+def _find_key(document: Any, key: str) -> Any:
+    """First value stored under `key` anywhere in a (nested) explain document"""
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        document = list(document.values())
+    if isinstance(document, list):
+        for item in document:
+            found = _find_key(item, key)
+            if found is not None:
+                return found
+    return None
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    stages = []
+    while isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0] or plan.get("queryPlan")
+    return stages
+
+
+class SlowQueryRecorder(monitoring.CommandListener):
+    """
+    Records every MongoDB command slower than the threshold: collection,
+    filter shape, calling handler / job and documents returned. Documents
+    examined are not part of a command reply; they are only known once an
+    explain (executionStats) is captured on demand, which also shows whether
+    the plan was a collection scan. Only the read part of explainable commands
+    is kept for that (see explainable_command), never inserted or updated data.
+    """
+
+    def __init__(self, threshold_ms: float = None, max_entries: int = None):
+        self.threshold_ms = threshold_ms if threshold_ms is not None else float(
+            os.getenv("SLOW_QUERY_MS", DEFAULT_SLOW_QUERY_MS))
+        self.max_entries = max_entries or int(os.getenv("SLOW_QUERY_LOG_SIZE", DEFAULT_SLOW_QUERY_LOG_SIZE))
+        self._lock = threading.Lock()
+        self._pending: Dict[tuple, tuple] = {}
+        self._entries: deque = deque(maxlen=self.max_entries)
+
+    # ============ LISTENER ============
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        self._pending[(event.connection_id, event.request_id)] = (event.command, event.database_name, current_caller())
+
+    def _finish(self, event, reply: Optional[dict], error: Optional[str]):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        command, database, caller = pending
+        command_name = event.command_name
+        target = command.get("collection") if command_name == "getMore" else command.get(command_name)
+        entry = {
+            "id": str(uuid.uuid4()),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "command": command_name,
+            "database": database,
+            "collection": target if isinstance(target, str) else "",
+            "duration_ms": round(duration_ms, 2),
+            "caller": caller,
+            "filter_shape": query_shape(command_filter(command_name, command)),
+            "sort_shape": query_shape(command.get("sort")) if command.get("sort") else None,
+            "docs_returned": docs_returned(reply) if reply else None,
+            "error": error,
+            "explain": None,
+            # Kept (not returned by the API) so the command can be explained later
+            "_command": explainable_command(command_name, command),
+        }
+        with self._lock:
+            self._entries.append(entry)
+        print(f"Slow MongoDB {command_name} on {entry['collection'] or database} "
+              f"({entry['duration_ms']} ms) from {caller}: {entry['filter_shape']}")
+
+    def succeeded(self, event):
+        self._finish(event, event.reply, None)
+
+    def failed(self, event):
+        self._finish(event, None, str(event.failure.get("errmsg", event.failure)))
+
+    # ============ QUERIES ============
+
+    @staticmethod
+    def _public(entry: Dict) -> Dict:
+        return {key: value for key, value in entry.items() if not key.startswith("_")}
+
+    def list(self, limit: int = 100, collection: Optional[str] = None, caller: Optional[str] = None) -> List[Dict]:
+        """Newest first"""
+        with self._lock:
+            entries = list(self._entries)
+        entries.reverse()
+        if collection:
+            entries = [entry for entry in entries if entry["collection"] == collection]
+        if caller:
+            entries = [entry for entry in entries if caller in entry["caller"]]
+        return [self._public(entry) for entry in entries[:limit]]
+
+    def summary(self) -> List[Dict]:
+        """Slow operations grouped by collection, command, filter shape and caller, slowest total first"""
+        groups = {}
+        with self._lock:
+            entries = list(self._entries)
+        for entry in entries:
+            key = (entry["collection"], entry["command"], repr(entry["filter_shape"]), entry["caller"])
+            group = groups.setdefault(key, {
+                "collection": entry["collection"],
+                "command": entry["command"],
+                "filter_shape": entry["filter_shape"],
+                "caller": entry["caller"],
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "last_id": None,
+            })
+            group["count"] += 1
+            group["total_ms"] = round(group["total_ms"] + entry["duration_ms"], 2)
+            group["max_ms"] = max(group["max_ms"], entry["duration_ms"])
+            group["last_id"] = entry["id"]
+        return sorted(groups.values(), key=lambda group: group["total_ms"], reverse=True)
+
+    def get(self, entry_id: str) -> Optional[Dict]:
+        with self._lock:
+            for entry in self._entries:
+                if entry["id"] == entry_id:
+                    return entry
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # ============ EXPLAIN ============
+
+    async def explain(self, client, entry_id: str) -> Optional[Dict]:
+        """Re-run a recorded command under explain(executionStats) and attach the plan summary"""
+        entry = self.get(entry_id)
+        if entry is None:
+            return None
+        if entry["_command"] is None:
+            raise ValueError(f"{entry['command']} commands cannot be explained")
+
+        result = await client[entry["database"]].command(
+            {"explain": entry["_command"], "verbosity": "executionStats"}
+        )
+        execution = _find_key(result, "executionStats") or {}
+        stages = _plan_stages(_find_key(result, "winningPlan"))
+        entry["explain"] = {
+            "captured_at": datetime.now(timezone.utc).isoformat(),
+            "explained_as": next(iter(entry["_command"])),
+            "stages": stages,
+            "collection_scan": "COLLSCAN" in stages,
+            "docs_examined": execution.get("totalDocsExamined"),
+            "keys_examined": execution.get("totalKeysExamined"),
+            "docs_returned": execution.get("nReturned"),
+            "execution_ms": execution.get("executionTimeMillis"),
+        }
+        return self._public(entry)
@@ -3,9 +3,11 @@ import axios from 'axios';
 import { API } from '../App';
 import { toast } from 'sonner';
 import { ScrollText } from 'lucide-react';
+import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
 
 function ActivityLogs() {
   const [logs, setLogs] = useState([]);
+  const [stats, setStats] = useState([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -14,8 +16,12 @@ function ActivityLogs() {
 
   const fetchLogs = async () => {
     try {
-      const response = await axios.get(`${API}/activity-logs?limit=200`);
-      setLogs(response.data);
+      const [logsResponse, statsResponse] = await Promise.all([
+        axios.get(`${API}/activity-logs?limit=200`),
+        axios.get(`${API}/activity-logs/stats?days=30`)
+      ]);
+      setLogs(logsResponse.data);
+      setStats(statsResponse.data);
     } catch (error) {
       toast.error('Failed to load activity logs');
     } finally {
@@ -48,6 +54,21 @@ function ActivityLogs() {
         <h1 className="page-title" style={{ margin: 0 }}>Activity Logs</h1>
       </div>
 
+      {stats.length > 0 && (
+        <div className="card" style={{ padding: '1.5rem', marginBottom: '1.5rem' }}>
+          <h3 style={{ fontSize: '1rem', fontWeight: 600, marginBottom: '1rem' }}>Activity (last 30 days)</h3>
+          <ResponsiveContainer width="100%" height={200}>
+            <BarChart data={stats}>
+              <CartesianGrid strokeDasharray="3 3" />
+              <XAxis dataKey="day" />
+              <YAxis allowDecimals={false} />
+              <Tooltip />
+              <Bar dataKey="total" fill="#6366f1" name="Activities" />
+            </BarChart>
+          </ResponsiveContainer>
+        </div>
+      )}
+
       <div className="card" style={{ padding: '1.5rem' }}>
         <p style={{ color: '#64748b', marginBottom: '1.5rem', fontSize: '0.875rem' }}>📋 View-only log of all system activities</p>
         
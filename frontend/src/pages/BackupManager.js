@@ -3,6 +3,7 @@ import axios from 'axios';
 import { API } from '../App';
 import { Database, Download, Upload, Trash2, AlertTriangle, CheckCircle, RefreshCw } from 'lucide-react';
 import { toast } from 'sonner';
+import { waitForJob } from '../utils/helpers';
 
 function BackupManager() {
   const [backups, setBackups] = useState([]);
@@ -33,9 +34,10 @@ function BackupManager() {
     try {
       setCreating(true);
       const response = await axios.post(`${API}/backup/create`);
+      const result = await waitForJob(API, response.data.id);
       
-      if (response.data.success) {
-        toast.success(`Backup created: ${response.data.filename}`);
+      if (result.success) {
+        toast.success(`Backup created: ${result.filename}`);
         fetchBackups();
       }
     } catch (error) {
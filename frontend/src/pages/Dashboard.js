@@ -4,6 +4,7 @@ import { useNavigate } from 'react-router-dom';
 import { DollarSign, TrendingUp, TrendingDown, Users, Calendar, Bell, RefreshCw, Clock } from 'lucide-react';
 import { BarChart, Bar, LineChart, Line, PieChart, Pie, Cell, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 import { toast } from 'sonner';
+import { waitForJob } from '../utils/helpers';
 
 const API = process.env.REACT_APP_API_URL || 'https://unified-super-app-5.onrender.com';
 
@@ -57,7 +58,8 @@ function Dashboard() {
     try {
       setSyncing(true);
       const response = await axios.get(`${API}/api/sync/crm-finance`);
-      toast.success(`Synced: ${response.data.synced} new entries, ${response.data.skipped} already synced`);
+      const result = await waitForJob(`${API}/api`, response.data.id);
+      toast.success(`Synced: ${result.synced} new entries, ${result.skipped} already synced`);
       fetchDashboardData();
     } catch (error) {
       console.error('Sync error:', error);
@@ -4,6 +4,7 @@ import { API } from '@/App';
 import { toast } from 'sonner';
 import { Download, Upload, Trash2, RefreshCw } from 'lucide-react';
 import { exportToExcel, exportToCSV } from '@/utils/export';
+import { waitForJob } from '@/utils/helpers';
 
 function DataManagement() {
   const [loading, setLoading] = useState(false);
@@ -131,7 +132,8 @@ function DataManagement() {
     setLoading(true);
     try {
       const response = await axios.post(`${API}/admin/rebuild-accounting`);
-      toast.success(`Accounting rebuilt! Processed ${response.data.revenues_processed} revenues and ${response.data.expenses_processed} expenses.`);
+      const result = await waitForJob(API, response.data.id);
+      toast.success(`Accounting rebuilt! Processed ${result.revenues_processed} revenues and ${result.expenses_processed} expenses.`);
     } catch (error) {
       toast.error('Failed to rebuild accounting data');
     } finally {
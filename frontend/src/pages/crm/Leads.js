@@ -14,7 +14,8 @@ function Leads() {
   
   const [leads, setLeads] = useState([]);
   const [loading, setLoading] = useState(true);
-  const [pagination, setPagination] = useState({ total: 0, page: 1, pages: 1 });
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [pagination, setPagination] = useState({ total: 0, nextCursor: null, hasMore: false });
   const [showModal, setShowModal] = useState(false);
   const [editingLead, setEditingLead] = useState(null);
   
@@ -32,29 +33,33 @@ function Leads() {
       setFilters(prev => ({ ...prev, ...location.state }));
     }
     fetchLeads();
-  }, [filters, pagination.page]);
+  }, [filters]);
 
-  const fetchLeads = async () => {
+  // Keyset pagination: each "Load more" continues from the previous page's cursor
+  const fetchLeads = async (cursor = '') => {
     try {
-      setLoading(true);
+      cursor ? setLoadingMore(true) : setLoading(true);
       const params = {
-        skip: (pagination.page - 1) * 20,
         limit: 20,
+        cursor,
+        count: 'estimate',
         ...filters
       };
       
       const response = await axios.get(`${API}/api/crm/leads`, { params });
-      setLeads(response.data.leads || []);
+      const page = response.data.leads || [];
+      setLeads(prev => (cursor ? [...prev, ...page] : page));
       setPagination({
         total: response.data.total || 0,
-        page: response.data.page || 1,
-        pages: response.data.pages || 1
+        nextCursor: response.data.next_cursor,
+        hasMore: response.data.has_more
       });
     } catch (error) {
       console.error('Error fetching leads:', error);
       toast.error('Failed to load leads');
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -84,7 +89,6 @@ function Leads() {
 
   const clearFilters = () => {
     setFilters({ search: '', lead_type: '', status: '', source: '' });
-    setPagination(prev => ({ ...prev, page: 1 }));
   };
 
   const handleLeadSaved = () => {
@@ -310,32 +314,20 @@ function Leads() {
           </div>
 
           {/* Pagination */}
-          {pagination.pages > 1 && (
-            <div className="flex justify-between items-center mt-4">
-              <div className="text-sm text-gray-700">
-                Showing {(pagination.page - 1) * 20 + 1} to {Math.min(pagination.page * 20, pagination.total)} of {pagination.total} leads
-              </div>
-              <div className="flex gap-2">
-                <button
-                  onClick={() => setPagination({ ...pagination, page: pagination.page - 1 })}
-                  disabled={pagination.page === 1}
-                  className="btn btn-secondary btn-sm"
-                >
-                  Previous
-                </button>
-                <span className="px-4 py-2 bg-white border rounded text-sm">
-                  Page {pagination.page} of {pagination.pages}
-                </span>
-                <button
-                  onClick={() => setPagination({ ...pagination, page: pagination.page + 1 })}
-                  disabled={pagination.page === pagination.pages}
-                  className="btn btn-secondary btn-sm"
-                >
-                  Next
-                </button>
-              </div>
+          <div className="flex justify-between items-center mt-4">
+            <div className="text-sm text-gray-700">
+              Showing {leads.length} of {pagination.total} leads
             </div>
-          )}
+            {pagination.hasMore && (
+              <button
+                onClick={() => fetchLeads(pagination.nextCursor)}
+                disabled={loadingMore}
+                className="btn btn-secondary btn-sm"
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            )}
+          </div>
         </>
       )}
 
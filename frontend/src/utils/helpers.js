@@ -1,3 +1,5 @@
+import axios from 'axios';
+
 // Group items by month (YYYY-MM format)
 export const groupByMonth = (items) => {
   const grouped = {};
@@ -36,3 +38,15 @@ export const formatMonth = (monthStr) => {
   const date = new Date(monthStr + '-01');
   return date.toLocaleDateString('default', { month: 'long', year: 'numeric' });
 };
+
+// Poll a background job (202 responses from the API) until it finishes; resolves with its result
+export const waitForJob = async (apiBase, jobId, intervalMs = 2000) => {
+  while (true) {
+    const { data: job } = await axios.get(`${apiBase}/jobs/${jobId}`);
+    if (job.status === 'succeeded') return job.result;
+    if (job.status === 'failed' || job.status === 'cancelled') {
+      throw new Error(job.error || `Job ${job.status}`);
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+};
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+In-process API benchmark for the backend.
+
+Runs the FastAPI app inside this process through httpx's ASGI transport
+(no server, no network), against a local mongod (--mongo-url) or, by
+default, an in-memory mongomock stand-in. Seeds a synthetic dataset
+(revenues, expenses, ledgers and leads), hits the key endpoints with
+concurrent requests and reports throughput and p50 / p95 / p99 latency.
+
+Exits with status 1 when a budget (--budget) or the allowed regression
+against a previous run (--baseline / --max-regression) is exceeded, and
+with status 2 when the budget file has no entry for the backend / size
+and no baseline is given.
+
+Latency ceilings only exist for mongod: under mongomock the timings measure
+its pure-Python query engine, so the mongomock budgets only check for errors.
+Compare mongomock runs against a baseline recorded on the same machine.
+
+    python tests/benchmark.py --size 10k
+    python tests/benchmark.py --size 100k --mongo-url mongodb://localhost:27017 --output bench.json
+    python tests/benchmark.py --baseline bench.json --max-regression 20
+
+Requires httpx, plus mongomock-motor when no --mongo-url is given
+(pip install -r tests/requirements.txt).
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import logging
+import argparse
+import statistics
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, List, Callable
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+DEFAULT_BUDGET = Path(__file__).resolve().parent / "benchmark_budget.json"
+
+# Documents seeded per collection
+DATASET_SIZES = {"10k": 10000, "100k": 100000, "1m": 1000000}
+SEED_BATCH_SIZE = 5000
+
+SOURCES = ["Visa", "Ticket", "Package"]
+PAYMENT_MODES = ["Cash", "Bank Transfer", "UPI"]
+EXPENSE_CATEGORIES = ["Office Rent", "Staff Salaries", "Marketing", "Utilities", "Travel Expenses", "Miscellaneous"]
+LEAD_STATUSES = ["New", "In Process", "Booked", "Converted", "Lost"]
+LEAD_SOURCES = ["Instagram", "Facebook", "Referral", "Walk-in", "Website"]
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Ishaan", "Kabir", "Meera", "Rohan", "Saanvi", "Zara", "Neha"]
+LAST_NAMES = ["Sharma", "Verma", "Iyer", "Khan", "Patel", "Reddy", "Nair", "Gupta", "Singh", "Das"]
+
+
+# ============ DATASET ============
+
+class DatasetSeeder:
+    """Writes a reproducible synthetic dataset straight into the database"""
+
+    def __init__(self, db, accounting, size: int, seed: int = 42):
+        self.db = db
+        self.accounting = accounting
+        self.size = size
+        self.random = random.Random(seed)
+        self.today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.revenue_ids: List[str] = []
+        self.lead_names: List[str] = []
+
+    def _date(self) -> str:
+        return (self.today - timedelta(days=self.random.randint(0, 730))).strftime("%Y-%m-%d")
+
+    def _name(self) -> str:
+        return f"{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}"
+
+    def _revenue(self, i: int) -> dict:
+        sale_price = float(self.random.randint(5000, 200000))
+        cost = round(sale_price * self.random.uniform(0.5, 0.9), 2)
+        received = sale_price if self.random.random() < 0.7 else round(sale_price * self.random.uniform(0, 0.9), 2)
+        return {
+            "id": f"rev-{i:08d}",
+            "date": self._date(),
+            "client_name": self._name(),
+            "source": self.random.choice(SOURCES),
+            "payment_mode": self.random.choice(PAYMENT_MODES),
+            "pending_amount": round(sale_price - received, 2),
+            "received_amount": received,
+            "status": "Received" if received == sale_price else "Pending",
+            "supplier": "",
+            "notes": "",
+            "sale_price": sale_price,
+            "cost_price_details": [],
+            "total_cost_price": cost,
+            "profit": round(sale_price - cost, 2),
+            "profit_margin": round((sale_price - cost) / sale_price * 100, 2),
+            "partial_payments": [],
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    def _expense(self, i: int) -> dict:
+        return {
+            "id": f"exp-{i:08d}",
+            "date": self._date(),
+            "category": self.random.choice(EXPENSE_CATEGORIES),
+            "payment_mode": self.random.choice(PAYMENT_MODES),
+            "amount": float(self.random.randint(500, 50000)),
+            "description": "Synthetic expense",
+            "purchase_type": "General Expense",
+            "supplier_gstin": "",
+            "invoice_number": "",
+            "gst_rate": 0.0,
+            "linked_revenue_id": None,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    def _lead(self, i: int) -> dict:
+        from crm.search import build_search_keys
+
+        created_at = datetime.utcnow() - timedelta(minutes=i)
+        name = self._name()
+        lead = {
+            "lead_id": f"LD-{created_at.strftime('%Y%m%d')}-{i % 10000:04d}",
+            "referral_code": f"{i:06X}"[-6:],
+            "client_name": name,
+            "primary_phone": f"+91 9{self.random.randint(100000000, 999999999)}",
+            "alternate_phone": None,
+            "email": f"{name.split()[0].lower()}{i}@example.com",
+            "lead_type": self.random.choice(SOURCES),
+            "source": self.random.choice(LEAD_SOURCES),
+            "reference_from": None,
+            "travel_date": datetime.utcnow() + timedelta(days=self.random.randint(-60, 120)),
+            "status": self.random.choice(LEAD_STATUSES),
+            "labels": [],
+            "notes": None,
+            "created_by": "benchmark",
+            "created_at": created_at,
+            "updated_at": created_at,
+            "documents": [],
+            "referred_clients": [],
+            "loyalty_points": 0,
+            "revenue_id": None
+        }
+        lead["search_keys"] = build_search_keys(lead)
+        return lead
+
+    def _ledger_lines(self, revenue: dict, expense: dict) -> Dict[str, List[dict]]:
+        lines = {"ledgers": [], "gst_records": []}
+        entry = self.accounting.build_revenue_ledger_entry(revenue)
+        if entry:
+            lines["ledgers"].extend(entry["ledgers"])
+            lines["gst_records"].extend(entry["gst_records"])
+        lines["ledgers"].extend(self.accounting.build_expense_ledger_entry(expense)["ledgers"])
+        return lines
+
+    async def _insert(self, collection_name: str, build: Callable[[int], dict]):
+        for start in range(0, self.size, SEED_BATCH_SIZE):
+            docs = [build(i) for i in range(start, min(start + SEED_BATCH_SIZE, self.size))]
+            await self.db[collection_name].insert_many(docs, ordered=False)
+
+    async def seed(self):
+        for name in ("revenues", "expenses", "ledgers", "gst_records", "leads", "reminders", "monthly_rollups"):
+            await self.db[name].delete_many({})
+
+        await self._insert("revenues", self._revenue)
+        await self._insert("expenses", self._expense)
+        await self._insert("leads", self._lead)
+
+        # Ledgers come from the real ledger builders, until `size` lines exist
+        written = 0
+        i = 0
+        while written < self.size:
+            batch = {"ledgers": [], "gst_records": []}
+            while len(batch["ledgers"]) < SEED_BATCH_SIZE and written + len(batch["ledgers"]) < self.size:
+                for name, docs in self._ledger_lines(self._revenue(i), self._expense(i)).items():
+                    batch[name].extend(docs)
+                i += 1
+            batch["ledgers"] = batch["ledgers"][:self.size - written]
+            for name, docs in batch.items():
+                if docs:
+                    await self.db[name].insert_many(docs, ordered=False)
+            written += len(batch["ledgers"])
+
+        self.revenue_ids = [f"rev-{i:08d}" for i in range(min(self.size, 1000))]
+        self.lead_names = [self._name() for _ in range(50)]
+
+
+# ============ SCENARIOS ============
+
+def build_scenarios(seeder: DatasetSeeder) -> List[Dict]:
+    """Endpoints measured: name -> request factory (called once per request with a counter)"""
+    rng = random.Random(7)
+
+    def revenue_body(_):
+        sale_price = float(rng.randint(10000, 100000))
+        return {
+            "date": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+            "client_name": rng.choice(seeder.lead_names),
+            "source": rng.choice(SOURCES),
+            "payment_mode": "Bank Transfer",
+            "pending_amount": 0.0,
+            "received_amount": sale_price,
+            "status": "Received",
+            "sale_price": sale_price,
+            "cost_price_details": [
+                {"vendor_name": f"Vendor {n}", "category": "Hotel", "amount": round(sale_price * 0.2, 2),
+                 "payment_date": datetime.now(timezone.utc).strftime("%Y-%m-%d")}
+                for n in range(3)
+            ]
+        }
+
+    return [
+        {"name": "revenue_page", "method": "GET", "path": lambda n: "/api/revenue?limit=50"},
+        {"name": "revenue_page_by_status", "method": "GET", "path": lambda n: "/api/revenue?limit=50&status=Pending"},
+        {"name": "expense_page", "method": "GET", "path": lambda n: "/api/expenses?limit=50"},
+        {"name": "dashboard_summary", "method": "GET", "path": lambda n: "/api/dashboard/summary"},
+        {"name": "dashboard_monthly", "method": "GET", "path": lambda n: "/api/dashboard/monthly"},
+        {"name": "reports", "method": "GET", "path": lambda n: "/api/reports"},
+        {"name": "trial_balance", "method": "GET", "path": lambda n: "/api/accounting/trial-balance"},
+        {"name": "cash_ledger", "method": "GET", "path": lambda n: "/api/accounting/ledger?account=Cash"},
+        {"name": "crm_leads_page", "method": "GET", "path": lambda n: "/api/crm/leads?limit=20&count=none"},
+        {"name": "crm_leads_search", "method": "GET",
+         "path": lambda n: f"/api/crm/leads?limit=20&count=none&search={seeder.lead_names[n % len(seeder.lead_names)].split()[0][:4]}"},
+        {"name": "crm_dashboard_summary", "method": "GET", "path": lambda n: "/api/crm/dashboard-summary"},
+        {"name": "create_revenue", "method": "POST", "path": lambda n: "/api/revenue", "body": revenue_body},
+        {"name": "update_revenue", "method": "PUT",
+         "path": lambda n: f"/api/revenue/{seeder.revenue_ids[n % len(seeder.revenue_ids)]}",
+         "body": lambda n: {"notes": f"benchmark update {n}", "sale_price": float(10000 + n)}},
+    ]
+
+
+# ============ MEASUREMENT ============
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def run_scenario(client, scenario: Dict, requests: int, concurrency: int, warmup: int) -> Dict:
+    async def call(n: int):
+        body = scenario.get("body")
+        start = time.perf_counter()
+        response = await client.request(scenario["method"], scenario["path"](n), json=body(n) if body else None)
+        return (time.perf_counter() - start) * 1000, response.status_code
+
+    for n in range(warmup):
+        await call(n)
+
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(warmup, warmup + requests))
+
+    async def worker():
+        nonlocal errors
+        for n in counter:
+            elapsed_ms, status = await call(n)
+            latencies.append(elapsed_ms)
+            if status >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "name": scenario["name"],
+        "method": scenario["method"],
+        "requests": requests,
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "throughput_rps": round(requests / wall, 2) if wall else 0.0,
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+
+# ============ BUDGETS ============
+
+def load_budget(path: Optional[Path], backend: str, size_name: str) -> Dict:
+    """
+    Budget file: {backend: {size: {"default": {...}, "endpoints": {name: {...}}}}}
+    with p50_ms / p95_ms / p99_ms ceilings, min_throughput_rps and max_error_rate
+    """
+    if not path or not path.exists():
+        return {}
+    return json.loads(path.read_text()).get(backend, {}).get(size_name, {})
+
+
+def check_results(results: List[Dict], budget: Dict, baseline: Optional[Dict], max_regression: float) -> List[str]:
+    violations = []
+    defaults = budget.get("default", {})
+    baseline_results = {result["name"]: result for result in (baseline or {}).get("results", [])}
+
+    for result in results:
+        limits = {**defaults, **budget.get("endpoints", {}).get(result["name"], {})}
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if metric in limits and result[metric] > limits[metric]:
+                violations.append(f"{result['name']}: {metric} {result[metric]} > budget {limits[metric]}")
+        if "min_throughput_rps" in limits and result["throughput_rps"] < limits["min_throughput_rps"]:
+            violations.append(f"{result['name']}: throughput {result['throughput_rps']} rps < budget {limits['min_throughput_rps']}")
+        if result["error_rate"] > limits.get("max_error_rate", 0.0):
+            violations.append(f"{result['name']}: error rate {result['error_rate']} > budget {limits.get('max_error_rate', 0.0)}")
+
+        previous = baseline_results.get(result["name"])
+        if previous and max_regression is not None:
+            for metric in ("p95_ms", "p99_ms"):
+                allowed = previous[metric] * (1 + max_regression / 100)
+                if previous[metric] and result[metric] > allowed:
+                    violations.append(
+                        f"{result['name']}: {metric} {result[metric]} regressed more than {max_regression}% "
+                        f"over baseline {previous[metric]}"
+                    )
+    return violations
+
+
+def print_table(results: List[Dict]):
+    header = f"{'endpoint':<24}{'req':>6}{'err':>5}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['name']:<24}{r['requests']:>6}{r['errors']:>5}{r['throughput_rps']:>9}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['max_ms']:>10}")
+
+
+# ============ RUN ============
+
+def load_app(mongo_url: Optional[str], database: str):
+    """Import the backend with its database pointed at the benchmark target"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ["MONGO_DB"] = database
+    # Seeded users are hashed at startup; the benchmark does not measure login
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    # No backup may start (at midnight) in the middle of a run
+    os.environ["BACKUP_SCHEDULE_ENABLED"] = "false"
+
+    import database as database_module
+    if mongo_url:
+        os.environ["MONGO_URL"] = mongo_url
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+        database_module.create_client = lambda uri=None, **overrides: AsyncMongoMockClient()
+
+    import server
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    return server
+
+
+async def wait_for_startup(server, timeout: float = 300.0):
+    """
+    Wait until the work started at startup is done, so it is not measured: no job
+    still active, the activity log queue drained, rollups built and leads carrying
+    search keys.
+    """
+    from job_runner import ACTIVE_STATUSES
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        active_jobs = await server.db.jobs.count_documents({"status": {"$in": ACTIVE_STATUSES}})
+        queue = server.activity_logger._queue
+        if not active_jobs and (queue is None or queue.empty()):
+            break
+        if loop.time() > deadline:
+            raise RuntimeError(f"Startup work still running after {timeout}s ({active_jobs} active jobs)")
+        await asyncio.sleep(0.5)
+
+    if not await server.db.monthly_rollups.find_one({}, {"_id": 1}):
+        raise RuntimeError("Monthly rollups were not built at startup")
+    if await server.db.leads.find_one({"search_keys": {"$exists": False}}, {"_id": 1}):
+        raise RuntimeError("Leads without search keys after startup")
+
+
+async def main(args) -> int:
+    import httpx
+
+    size = DATASET_SIZES[args.size]
+    if args.mongo_url and "bench" not in args.database:
+        print(f"❌ Refusing to seed '{args.database}': the benchmark database name must contain 'bench'")
+        return 2
+    if not args.mongo_url and size > DATASET_SIZES["100k"]:
+        print("⚠️  mongomock keeps everything in memory; use --mongo-url for the 1m dataset")
+
+    server = load_app(args.mongo_url, args.database)
+    seeder = DatasetSeeder(server.db, server.accounting, size)
+
+    print(f"Seeding {size} revenues / expenses / ledgers / leads into "
+          f"{'mongod' if args.mongo_url else 'mongomock'} ({args.database})...")
+    start = time.perf_counter()
+    await seeder.seed()
+    print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+    scenarios = build_scenarios(seeder)
+    if args.only:
+        scenarios = [scenario for scenario in scenarios if scenario["name"] in args.only]
+
+    results = []
+    async with server.lifespan(server.app):
+        # Rollups are rebuilt by startup (they were cleared); balances follow the seeded ledgers
+        await server.accounting_rebuilder.recompute_balances()
+        await wait_for_startup(server)
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for scenario in scenarios:
+                result = await run_scenario(client, scenario, args.requests, args.concurrency, args.warmup)
+                print(f"  {result['name']}: p95 {result['p95_ms']} ms, {result['throughput_rps']} rps")
+                results.append(result)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "size": args.size,
+        "backend": "mongod" if args.mongo_url else "mongomock",
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "results": results
+    }
+    print()
+    print_table(results)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\nResults written to {args.output}")
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    if baseline and (baseline.get("backend"), baseline.get("size")) != (report["backend"], report["size"]):
+        print(f"\n❌ Baseline {args.baseline} was recorded with {baseline.get('backend')} / {baseline.get('size')}, "
+              f"not {report['backend']} / {report['size']}")
+        return 2
+    budget = load_budget(Path(args.budget) if args.budget else None, report["backend"], args.size)
+    if not budget and baseline is None:
+        if args.budget:
+            print(f"\n❌ {args.budget} has no budget for {report['backend']} / {args.size} and no --baseline was "
+                  f"given, so nothing was checked (pass --budget '' to only report)")
+            return 2
+        print("\n⚠️  No budget and no baseline: results were not checked")
+        return 0
+    violations = check_results(results, budget, baseline, args.max_regression)
+    if violations:
+        print("\n❌ Regression budget exceeded:")
+        for violation in violations:
+            print(f"   {violation}")
+        return 1
+    print("\n✅ Within budget")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="In-process API benchmark")
+    parser.add_argument("--size", choices=sorted(DATASET_SIZES), default="10k", help="documents seeded per collection")
+    parser.add_argument("--mongo-url", default=None, help="local mongod to use instead of mongomock")
+    parser.add_argument("--database", default="souldashboard_benchmark", help="database seeded (its collections are wiped)")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10, help="requests in flight per endpoint")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests per endpoint")
+    parser.add_argument("--only", nargs="*", help="endpoint names to run (default: all)")
+    parser.add_argument("--budget", default=str(DEFAULT_BUDGET), help="JSON budget file ('' to skip)")
+    parser.add_argument("--baseline", default=None, help="results JSON of a previous run to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed p95 / p99 growth over the baseline, in percent")
+    parser.add_argument("--output", default=None, help="write the results JSON here")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,47 @@
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+@pytest.fixture
+def db():
+    """Fresh in-memory database (mongomock) per test"""
+    from mongomock_motor import AsyncMongoMockClient
+    return AsyncMongoMockClient()[f"test_{uuid.uuid4().hex[:8]}"]
+
+
+@pytest.fixture(scope="session")
+def server_module():
+    """The backend app module, with its client pointed at an in-memory mongomock"""
+    import os
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("MONGO_DB", "test_server")
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    os.environ["BACKUP_SCHEDULE_ENABLED"] = "false"
+
+    import database
+    from mongomock_motor import AsyncMongoMockClient
+    database.create_client = lambda uri=None, **overrides: AsyncMongoMockClient()
+
+    import server
+    return server
+
+
+@pytest.fixture
+def server(server_module):
+    """server_module with every collection emptied and in-process caches dropped"""
+    import asyncio
+
+    async def reset():
+        for name in await server_module.db.list_collection_names():
+            await server_module.db.drop_collection(name)
+
+    asyncio.run(reset())
+    server_module.accounting.invalidate_accounts()
+    return server_module
@@ -0,0 +1,99 @@
+import asyncio
+
+from accounting_service import AccountingService, JournalBatch
+
+
+def test_commit_journal_writes_documents_and_nets_postings_per_account(db):
+    async def scenario():
+        accounting = AccountingService(db)
+        await accounting.initialize_accounts()
+        batch = JournalBatch()
+        batch.add("ledgers",
+                  {"id": "l1", "account": "Cash", "debit": 100.0, "credit": 0.0},
+                  {"id": "l2", "account": "Sales Revenue", "debit": 0.0, "credit": 100.0})
+        batch.post("Cash", 100.0, "debit")
+        batch.post("Cash", 30.0, "credit")
+        batch.post("Sales Revenue", 70.0, "credit")
+        await accounting.commit_journal(batch)
+        accounts = {account["name"]: account async for account in db.accounts.find({}, {"_id": 0})}
+        return accounts, await db.ledgers.count_documents({})
+
+    accounts, ledger_lines = asyncio.run(scenario())
+
+    assert ledger_lines == 2
+    assert accounts["Cash"]["balance"] == 70.0
+    assert accounts["Sales Revenue"]["balance"] == -70.0
+
+
+def test_commit_journal_auto_creates_accounts_with_codes(db):
+    async def scenario():
+        accounting = AccountingService(db)
+        await accounting.initialize_accounts()
+        for _ in range(2):
+            batch = JournalBatch()
+            batch.post("Vendor - Foo", 10.0, "debit")
+            await accounting.commit_journal(batch)
+        return await db.accounts.find({"name": "Vendor - Foo"}, {"_id": 0}).to_list(None)
+
+    accounts = asyncio.run(scenario())
+
+    assert len(accounts) == 1
+    assert accounts[0]["type"] == "Expenses"
+    assert accounts[0]["code"].startswith("EXP-")
+    assert accounts[0]["balance"] == 20.0
+
+
+def test_empty_journal_writes_nothing(db):
+    async def scenario():
+        accounting = AccountingService(db)
+        await accounting.commit_journal(JournalBatch())
+        return await db.ledgers.count_documents({}), await db.accounts.count_documents({})
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+
+def test_ensure_accounts_caches_the_stored_account_after_losing_a_creation_race(db):
+    async def scenario():
+        await db.accounts.create_index("name", unique=True)
+        winner, loser = AccountingService(db), AccountingService(db)
+        await winner.initialize_accounts()
+        await loser.load_accounts()
+        reserve_codes = loser._next_account_codes
+
+        async def create_concurrently(count, session=None):
+            # The other worker creates the account between our reload and our insert
+            await winner.ensure_accounts({"Vendor - Foo": "Expenses"})
+            return await reserve_codes(count, session=session)
+
+        loser._next_account_codes = create_concurrently
+        created = await loser.ensure_accounts({"Vendor - Foo": "Expenses", "Vendor - Bar": "Expenses"})
+        stored = await db.accounts.find_one({"name": "Vendor - Foo"}, {"_id": 0, "balance": 0, "created_at": 0})
+        return created, stored, loser._accounts
+
+    created, stored, cache = asyncio.run(scenario())
+
+    assert [account["name"] for account in created] == ["Vendor - Bar"]
+    assert cache["Vendor - Foo"] == stored
+    assert cache["Vendor - Bar"]["code"] != stored["code"]
+
+
+def test_postings_recreate_an_account_that_vanished_behind_the_cache_with_a_code(db):
+    async def scenario():
+        accounting = AccountingService(db)
+        await accounting.initialize_accounts()
+        batch = JournalBatch()
+        batch.post("Vendor - Foo", 10.0, "debit")
+        await accounting.commit_journal(batch)
+        # e.g. a restore in another worker
+        await db.accounts.delete_one({"name": "Vendor - Foo"})
+
+        batch = JournalBatch()
+        batch.post("Vendor - Foo", 5.0, "debit")
+        await accounting.commit_journal(batch)
+        return await db.accounts.find({"name": "Vendor - Foo"}, {"_id": 0}).to_list(None)
+
+    accounts = asyncio.run(scenario())
+
+    assert len(accounts) == 1
+    assert accounts[0]["code"].startswith("EXP-")
+    assert accounts[0]["balance"] == 5.0
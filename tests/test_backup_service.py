@@ -0,0 +1,134 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from activity_logger import ActivityLogger
+from backup_service import BackupService, STAGING_SUFFIX
+
+
+@pytest.fixture
+def backups(db, tmp_path):
+    service = BackupService(db, ActivityLogger(db))
+    service.backup_dir = tmp_path
+    return service
+
+
+def test_swap_staging_replaces_live_collections(db, backups):
+    async def scenario():
+        for name in ("revenues", "expenses"):
+            await db[name].insert_one({"v": "live"})
+            await db[f"{name}{STAGING_SUFFIX}"].insert_one({"v": "restored"})
+        await backups._swap_staging(["revenues", "expenses"])
+        return (sorted(await db.list_collection_names()),
+                [await db[name].find_one({}, {"_id": 0}) for name in ("revenues", "expenses")])
+
+    names, docs = asyncio.run(scenario())
+
+    assert names == ["expenses", "revenues"]
+    assert docs == [{"v": "restored"}, {"v": "restored"}]
+
+
+def test_swap_staging_rolls_back_when_a_rename_fails(db, backups):
+    async def scenario():
+        for name in ("revenues", "expenses"):
+            await db[name].insert_one({"v": "live"})
+        # expenses has no staging collection, so its rename fails after revenues moved
+        await db[f"revenues{STAGING_SUFFIX}"].insert_one({"v": "restored"})
+        with pytest.raises(Exception):
+            await backups._swap_staging(["revenues", "expenses"])
+        return (sorted(await db.list_collection_names()),
+                [await db[name].find_one({}, {"_id": 0}) for name in ("revenues", "expenses")])
+
+    names, docs = asyncio.run(scenario())
+
+    assert docs == [{"v": "live"}, {"v": "live"}]
+    assert not any(name.endswith("__previous") for name in names)
+
+
+class FakeChangeStream:
+    """Replays prepared change events the way a Motor change stream hands them out"""
+
+    def __init__(self, events, token):
+        self.events = list(events)
+        self.resume_token = token
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def try_next(self):
+        if not self.events:
+            return None
+        change = self.events.pop(0)
+        self.resume_token = change["_id"]
+        return change
+
+
+class ChangeStreamDatabase:
+    """mongomock has no change streams: the database, plus a watch() over prepared events"""
+
+    def __init__(self, db):
+        self._db = db
+        self.events = []
+        self.token = {"_data": "0"}
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+    def __getitem__(self, name):
+        return self._db[name]
+
+    def watch(self, *args, **kwargs):
+        events, self.events = self.events, []
+        if events:
+            self.token = events[-1]["_id"]
+        return FakeChangeStream(events, self.token)
+
+    def record(self, operation, collection_name, document_id, document=None):
+        self.events.append({
+            "_id": {"_data": str(len(self.events) + int(self.token["_data"]) + 1)},
+            "operationType": operation,
+            "clusterTime": SimpleNamespace(time=int(time.time()) - 1),
+            "ns": {"coll": collection_name},
+            "documentKey": {"_id": document_id},
+            "fullDocument": document,
+        })
+
+
+def test_incremental_backup_streams_changes_in_batches_and_restores_them(db, backups):
+    async def scenario():
+        backups.db = watched = ChangeStreamDatabase(db)
+        backups.batch_size = 2
+        await db.revenues.insert_many([{"_id": i, "id": f"r{i}", "amount": i} for i in range(3)])
+        full = await backups.create_backup(mode="full")
+        time.sleep(1)  # backup names have a one second resolution
+
+        # Five updates of document 0, then a delete and an insert, streamed two documents per batch
+        for amount in (10, 20, 30, 40, 50):
+            await db.revenues.update_one({"_id": 0}, {"$set": {"amount": amount}})
+            watched.record("update", "revenues", 0, await db.revenues.find_one({"_id": 0}))
+        await db.revenues.delete_one({"_id": 1})
+        watched.record("delete", "revenues", 1)
+        await db.revenues.insert_one({"_id": 3, "id": "r3", "amount": 3})
+        watched.record("insert", "revenues", 3, await db.revenues.find_one({"_id": 3}))
+        incremental = await backups.create_backup(mode="auto")
+        expected = await db.revenues.find({}).sort("_id", 1).to_list(None)
+        manifest = backups.read_manifest(backups.backup_dir / incremental["filename"])
+
+        await db.revenues.delete_many({})
+        restored = await backups.restore_backup(incremental["filename"])
+        return full, incremental, manifest, restored, expected, await db.revenues.find({}).sort("_id", 1).to_list(None)
+
+    full, incremental, manifest, restored, expected, documents = asyncio.run(scenario())
+
+    assert full["type"] == "full"
+    assert incremental["type"] == "incremental"
+    delta = manifest["collections"]["revenues"]
+    # Only the latest change of document 0 is kept in the batch it shares with the delete
+    assert (delta["count"], delta["upserts"], delta["deletes"]) == (3, 2, 1)
+    assert restored["success"], restored
+    assert documents == expected
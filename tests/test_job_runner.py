@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from job_runner import JobRunner, JobConflict, JOB_CANCELLED, JOB_FAILED, JOB_SUCCEEDED, JOB_RUNNING
+
+
+async def prepare(db):
+    # Same partial unique index as the jobs spec in index_manager
+    await db.jobs.create_index("type", name="ix_type_active", unique=True, partialFilterExpression={"active": True})
+
+
+async def wait_for_status(runner, job_id, *statuses):
+    for _ in range(100):
+        job = await runner.get(job_id)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job stayed {job['status']}")
+
+
+def test_submit_reuses_the_active_job_and_rejects_different_params(db):
+    async def scenario():
+        await prepare(db)
+        runner, release = JobRunner(db), asyncio.Event()
+
+        async def work(job):
+            await release.wait()
+            return {"ok": True}
+
+        first = await runner.submit("backup", work, params={"full": False})
+        again = await runner.submit("backup", work, params={"full": False})
+        with pytest.raises(JobConflict):
+            await runner.submit("backup", work, params={"full": True})
+        release.set()
+        done = await wait_for_status(runner, first["id"], JOB_SUCCEEDED)
+        after = await runner.submit("backup", work, params={"full": True})
+        await runner.shutdown()
+        return first, again, done, after
+
+    first, again, done, after = asyncio.run(scenario())
+
+    assert again["id"] == first["id"]
+    assert done["result"] == {"ok": True} and done["active"] is False
+    assert after["id"] != first["id"]
+
+
+def test_cancel_from_another_worker_reaches_the_job_at_the_owners_heartbeat(db):
+    async def scenario():
+        await prepare(db)
+        owner, other = JobRunner(db), JobRunner(db)
+
+        async def work(job):
+            await asyncio.Event().wait()  # never calls job.progress
+
+        job = await owner.submit("backup", work)
+        await wait_for_status(owner, job["id"], JOB_RUNNING)
+        await other.cancel(job["id"])
+        still_running = (await owner.get(job["id"]))["status"]
+        await owner.heartbeat()
+        cancelled = await wait_for_status(owner, job["id"], JOB_CANCELLED)
+        await owner.shutdown()
+        return still_running, cancelled
+
+    still_running, cancelled = asyncio.run(scenario())
+
+    assert still_running == JOB_RUNNING
+    assert cancelled["active"] is False
+
+
+def test_recover_only_fails_jobs_with_a_stale_heartbeat(db):
+    async def scenario():
+        now = datetime.now(timezone.utc)
+        await db.jobs.insert_many([
+            {"id": "fresh", "type": "a", "status": "running", "active": True,
+             "worker_id": "other", "heartbeat_at": now.isoformat()},
+            {"id": "stale", "type": "b", "status": "running", "active": True,
+             "worker_id": "other", "heartbeat_at": (now - timedelta(hours=1)).isoformat()},
+            {"id": "legacy", "type": "c", "status": "queued"},
+        ])
+        await JobRunner(db).recover()
+        return {job["id"]: job["status"] async for job in db.jobs.find({}, {"_id": 0})}
+
+    statuses = asyncio.run(scenario())
+
+    assert statuses == {"fresh": "running", "stale": JOB_FAILED, "legacy": JOB_FAILED}
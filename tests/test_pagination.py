@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from pagination import fetch_page, decode_cursor, encode_cursor, build_projection
+
+
+def test_fetch_page_walks_every_row_once_across_equal_sort_keys(db):
+    async def scenario():
+        await db.revenues.insert_many([
+            {"id": f"r{i}", "date": f"2026-01-0{1 + i // 3}", "amount": i} for i in range(8)
+        ])
+        seen, cursor = [], None
+        while True:
+            page = await fetch_page(db.revenues, {}, ["date", "id"], 3, cursor, {"_id": 0, "id": 1, "date": 1})
+            seen.extend(page["items"])
+            if not page["has_more"]:
+                assert page["next_cursor"] is None
+                return seen
+            cursor = page["next_cursor"]
+
+    rows = asyncio.run(scenario())
+
+    # Newest date first, id breaking the ties inside a date
+    assert [row["id"] for row in rows] == [f"r{i}" for i in range(7, -1, -1)]
+    assert all(set(row) == {"id", "date"} for row in rows)
+
+
+def test_fetch_page_applies_the_query_together_with_the_cursor(db):
+    async def scenario():
+        await db.expenses.insert_many([
+            {"id": f"e{i}", "date": "2026-02-01", "category": "Rent" if i % 2 else "Travel"} for i in range(6)
+        ])
+        first = await fetch_page(db.expenses, {"category": "Rent"}, ["date", "id"], 2)
+        second = await fetch_page(db.expenses, {"category": "Rent"}, ["date", "id"], 2, first["next_cursor"])
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert [row["id"] for row in first["items"]] == ["e5", "e3"]
+    assert [row["id"] for row in second["items"]] == ["e1"]
+    assert second["has_more"] is False
+
+
+def test_cursor_round_trip_and_malformed_cursor():
+    assert decode_cursor(encode_cursor(["2026-01-01", "r1"])) == ["2026-01-01", "r1"]
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_build_projection_always_includes_sort_keys():
+    assert build_projection("amount,client_name", ["date", "id"]) == {
+        "_id": 0, "amount": 1, "client_name": 1, "date": 1, "id": 1
+    }
+    assert build_projection(None, ["date", "id"]) == {"_id": 0}
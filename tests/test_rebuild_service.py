@@ -0,0 +1,41 @@
+import asyncio
+
+from accounting_service import AccountingService
+from rebuild_service import AccountingRebuildService
+
+
+def test_recompute_balances_types_accounts_missing_from_ledger_lines(db):
+    async def scenario():
+        accounting = AccountingService(db)
+        await accounting.initialize_accounts()
+        # Vendor payment and partial payment lines carry no account_type
+        await db.ledgers.insert_many([
+            {"account": "Vendor - Foo", "debit": 10.0, "credit": 0.0, "reference_type": "vendor_payment"},
+            {"account": "Customer - Bar", "debit": 0.0, "credit": 25.0, "reference_type": "partial_payment"},
+            {"account": "Cash", "debit": 15.0, "credit": 0.0, "account_type": "Assets"},
+        ])
+
+        await AccountingRebuildService(db, accounting).recompute_balances()
+        return {account["name"]: account async for account in db.accounts.find({}, {"_id": 0})}
+
+    accounts = asyncio.run(scenario())
+
+    assert accounts["Vendor - Foo"]["type"] == "Expenses"
+    assert accounts["Vendor - Foo"]["balance"] == 10.0
+    assert accounts["Customer - Bar"]["type"] == "Income"
+    assert accounts["Customer - Bar"]["balance"] == -25.0
+    assert accounts["Cash"]["balance"] == 15.0
+
+
+def test_recompute_balances_treats_missing_debit_or_credit_as_zero(db):
+    async def scenario():
+        accounting = AccountingService(db)
+        await accounting.initialize_accounts()
+        await db.ledgers.insert_one({"account": "Vendor - Foo", "debit": 10.0})
+
+        await AccountingRebuildService(db, accounting).recompute_balances()
+        return await db.accounts.find_one({"name": "Vendor - Foo"})
+
+    account = asyncio.run(scenario())
+
+    assert account["balance"] == 10.0
@@ -0,0 +1,47 @@
+import asyncio
+
+from rollup_service import RollupService
+
+
+async def rollup_values(db):
+    return {
+        (doc["month"], doc["type"], doc["key"]): doc["value"]
+        async for doc in db.monthly_rollups.find({"value": {"$ne": 0}})
+    }
+
+
+def test_incremental_rollups_match_rebuild_for_missing_source_and_category(db):
+    async def scenario():
+        rollups = RollupService(db)
+        revenues = [
+            {"id": "r1", "date": "2026-03-02", "status": "Received", "source": None, "received_amount": 100.0},
+            {"id": "r2", "date": "2026-03-05", "status": "Received", "received_amount": 50.0},
+            {"id": "r3", "date": "2026-03-09", "status": "Pending", "source": "Visa", "received_amount": 0.0},
+        ]
+        expenses = [{"id": "e1", "date": "2026-03-03", "category": None, "amount": 40.0}]
+        await db.revenues.insert_many([dict(revenue) for revenue in revenues])
+        await db.expenses.insert_many([dict(expense) for expense in expenses])
+        await rollups.apply(revenues=[(None, revenue) for revenue in revenues],
+                            expenses=[(None, expense) for expense in expenses])
+        incremental = await rollup_values(db)
+        await rollups.rebuild()
+        return incremental, await rollup_values(db)
+
+    incremental, rebuilt = asyncio.run(scenario())
+
+    assert incremental == rebuilt == {
+        ("2026-03", "revenue", "Other"): 150.0,
+        ("2026-03", "expense", "Other"): 40.0,
+    }
+
+
+def test_update_moves_the_amount_between_months_and_keys(db):
+    async def scenario():
+        rollups = RollupService(db)
+        old = {"date": "2026-03-02", "category": "Rent", "amount": 40.0}
+        new = {"date": "2026-04-01", "category": "Travel", "amount": 25.0}
+        await rollups.apply_expense(None, old)
+        await rollups.apply_expense(old, new)
+        return await rollup_values(db)
+
+    assert asyncio.run(scenario()) == {("2026-04", "expense", "Travel"): 25.0}
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockCollection
+
+
+
+async def rollup_values(db):
+    return {
+        (doc["month"], doc["type"], doc["key"]): doc["value"]
+        async for doc in db.monthly_rollups.find({"value": {"$ne": 0}})
+    }
+
+
+@pytest.fixture
+def yielding_writes(monkeypatch):
+    """Let other requests run between MongoDB round trips, as they would over a network"""
+    for name in ("find_one", "update_one", "find_one_and_update"):
+        method = getattr(AsyncMongoMockCollection, name)
+
+        def make_wrapper(method):
+            async def wrapper(self, *args, **kwargs):
+                await asyncio.sleep(0)
+                result = await method(self, *args, **kwargs)
+                await asyncio.sleep(0)
+                return result
+            return wrapper
+
+        monkeypatch.setattr(AsyncMongoMockCollection, name, make_wrapper(method))
+
+
+def test_concurrent_revenue_updates_keep_rollups_in_line_with_revenues(server, yielding_writes):
+    async def scenario():
+        await server.db.revenues.insert_one({
+            "id": "r1", "date": "2026-05-01", "client_name": "Foo", "source": "Visa",
+            "payment_mode": "Cash", "status": "Received", "received_amount": 100.0,
+            "pending_amount": 0.0, "created_at": "2026-05-01T00:00:00+00:00"
+        })
+        await server.rollups.rebuild()
+        await asyncio.gather(*[
+            server.update_revenue("r1", server.RevenueUpdate(received_amount=amount))
+            for amount in (150.0, 175.0, 200.0)
+        ])
+        incremental = await rollup_values(server.db)
+        await server.rollups.rebuild()
+        return incremental, await rollup_values(server.db)
+
+    incremental, rebuilt = asyncio.run(scenario())
+
+    assert incremental == rebuilt
+
+
+def test_concurrent_expense_updates_keep_rollups_in_line_with_expenses(server, yielding_writes):
+    async def scenario():
+        await server.db.expenses.insert_one({
+            "id": "e1", "date": "2026-05-02", "category": "Rent", "payment_mode": "Cash",
+            "amount": 40.0, "created_at": "2026-05-02T00:00:00+00:00"
+        })
+        await server.rollups.rebuild()
+        await asyncio.gather(*[
+            server.update_expense("e1", server.ExpenseUpdate(amount=amount, category=category))
+            for amount, category in ((60.0, "Travel"), (80.0, "Rent"), (90.0, "Utilities"))
+        ])
+        incremental = await rollup_values(server.db)
+        await server.rollups.rebuild()
+        return incremental, await rollup_values(server.db)
+
+    incremental, rebuilt = asyncio.run(scenario())
+
+    assert incremental == rebuilt